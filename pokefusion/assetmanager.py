@@ -1,8 +1,33 @@
+import hashlib
 import os
+from functools import cache, cached_property, lru_cache
+from io import BytesIO
 
+from .atlas import SpriteAtlas, atlas_path
 from .enums import Environment
 
 
+class StaticAsset:
+    """Image shipped with the bot, read once and shared by every send."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.filename = os.path.basename(path)
+
+    @cached_property
+    def data(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    @cached_property
+    def color(self) -> tuple[int, int, int]:
+        from . import imagelib
+        return imagelib.get_dominant_color(self.buffer(), normalize=True)
+
+    def buffer(self) -> BytesIO:
+        return BytesIO(self.data)
+
+
 class AssetManager:
     ASSETS_DIR = os.path.join("pokefusion", "assets")
     EGGS_DIR = os.path.join(ASSETS_DIR, "eggs")
@@ -10,12 +35,83 @@ class AssetManager:
     FUSIONS_DIR = os.path.join(ASSETS_DIR, "fusions")
     FUSIONS_AUTOGEN_DIR = os.path.join(FUSIONS_DIR, "autogen")
     FUSIONS_CUSTOM_DIR = os.path.join(FUSIONS_DIR, "custom")
+    FUSION_FOLDERS = (FUSIONS_AUTOGEN_DIR, FUSIONS_CUSTOM_DIR)
+    FUSION_COLORS_PATH = os.path.join(FUSIONS_DIR, "colors.bin")
     MISC_DIR = os.path.join(ASSETS_DIR, "misc")
     SPRITES_DIR = os.path.join(ASSETS_DIR, "sprites")
     SPRITES_BASE_DIR = os.path.join(SPRITES_DIR, "base")
     SPRITES_SHINY_DIR = os.path.join(SPRITES_DIR, "shiny")
     AVATARS_DIR = os.path.join(ASSETS_DIR, "avatars")
+    STATIC_MISC_FILES = ("Unknown.png", "Substitute.png", "BirthdayPresent.png", "ChristmasPresent.png")
 
     @classmethod
     def get_avatar_path(cls, env: Environment) -> str:
         return os.path.join(cls.AVATARS_DIR, f"avatar.{env}.png")
+
+    @classmethod
+    @cache
+    def get_static(cls, path: str) -> StaticAsset:
+        return StaticAsset(path)
+
+    @classmethod
+    def get_misc(cls, filename: str) -> StaticAsset:
+        return cls.get_static(os.path.join(cls.MISC_DIR, filename))
+
+    @classmethod
+    def get_avatar(cls, env: Environment) -> StaticAsset:
+        return cls.get_static(cls.get_avatar_path(env))
+
+    @classmethod
+    def get_atlas(cls, folder: str, head: int) -> SpriteAtlas | None:
+        path = atlas_path(folder, head)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        # Keyed on mtime so atlases replaced by an import are mapped again
+        return cls._open_atlas(path, mtime)
+
+    @classmethod
+    def get_unpacked_fusion_folders(cls) -> list[str]:
+        """Fusion folders that still have sprites in the per-file layout, see 'tools pack_atlases'."""
+        folders = []
+        for folder in cls.FUSION_FOLDERS:
+            try:
+                entries = list(os.scandir(folder))
+            except FileNotFoundError:
+                continue
+            if any(entry.is_dir() and entry.name.isdigit() for entry in entries):
+                folders.append(folder)
+        return folders
+
+    @classmethod
+    @lru_cache(maxsize=256)
+    def _open_atlas(cls, path: str, _mtime: int) -> SpriteAtlas:
+        return SpriteAtlas(path)
+
+    @classmethod
+    def hash_render_sources(cls) -> str:
+        """Digest of the size and mtime of the fusion atlases, eggs and fusion colors that renders are made from."""
+        digest = hashlib.sha256()
+        for folder in (cls.FUSIONS_AUTOGEN_DIR, cls.FUSIONS_CUSTOM_DIR, cls.EGGS_DIR):
+            try:
+                entries = sorted(os.scandir(folder), key=lambda entry: entry.name)
+            except FileNotFoundError:
+                entries = []
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    digest.update(f"{entry.path}:{stat.st_mtime_ns}:{stat.st_size};".encode())
+
+        try:
+            stat = os.stat(cls.FUSION_COLORS_PATH)
+            digest.update(f"{cls.FUSION_COLORS_PATH}:{stat.st_mtime_ns}:{stat.st_size};".encode())
+        except FileNotFoundError:
+            pass
+        return digest.hexdigest()
+
+    @classmethod
+    def preload_static(cls, env: Environment) -> None:
+        for asset in (*map(cls.get_misc, cls.STATIC_MISC_FILES), cls.get_avatar(env)):
+            asset.data
+            asset.color
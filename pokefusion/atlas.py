@@ -0,0 +1,104 @@
+import mmap
+import os
+import shutil
+import struct
+from collections.abc import Callable, Mapping
+from io import BytesIO
+from typing import BinaryIO
+
+ATLAS_MAGIC = b"PFAT"
+ATLAS_VERSION = 1
+ATLAS_EXTENSION = ".atlas"
+
+_HEADER = struct.Struct("<4sHH")  # magic, version, slot count
+_SLOT = struct.Struct("<II")  # offset, length
+
+
+class SpriteAtlas:
+    """
+    Fusion sprites of one head packed in a single file.
+
+    The file starts with a header and an index of ``(offset, length)`` slots, one per body, followed by the encoded
+    PNG data. It's memory-mapped, so a sprite is a zero-copy view into the file. Empty slots have a length of 0.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.slots = _HEADER.unpack_from(self._mmap)
+        if magic != ATLAS_MAGIC or version != ATLAS_VERSION:
+            raise ValueError(f"Not a v{ATLAS_VERSION} sprite atlas: '{path}'")
+
+    def __contains__(self, body: int) -> bool:
+        return self._slot(body)[1] > 0
+
+    def get(self, body: int) -> memoryview | None:
+        offset, length = self._slot(body)
+        if length == 0:
+            return None
+        return memoryview(self._mmap)[offset:offset + length]
+
+    def bodies(self) -> list[int]:
+        return [body for body in range(1, self.slots + 1) if body in self]
+
+    def _slot(self, body: int) -> tuple[int, int]:
+        if not 1 <= body <= self.slots:
+            return 0, 0
+        return _SLOT.unpack_from(self._mmap, _HEADER.size + (body - 1) * _SLOT.size)
+
+    @staticmethod
+    def write(path: str, sprites: Mapping[int, bytes]) -> None:
+        SpriteAtlas.write_from(path, {body: len(data) for body, data in sprites.items()},
+                               lambda body: BytesIO(sprites[body]))
+
+    @staticmethod
+    def write_from(path: str, sizes: Mapping[int, int], open_sprite: Callable[[int], BinaryIO]) -> None:
+        """Streams each sprite from ``open_sprite(body)`` into the atlas, the index is built from ``sizes`` upfront."""
+        slots = max(sizes, default=0)
+        index = bytearray(_HEADER.pack(ATLAS_MAGIC, ATLAS_VERSION, slots) + bytes(slots * _SLOT.size))
+        offset = len(index)
+
+        for body, size in sorted(sizes.items()):
+            _SLOT.pack_into(index, _HEADER.size + (body - 1) * _SLOT.size, offset, size)
+            offset += size
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(index)
+            for body in sorted(sizes):
+                with open_sprite(body) as sprite:
+                    shutil.copyfileobj(sprite, f)
+
+            if f.tell() != offset:
+                raise ValueError(f"Sprite sizes don't match the index of '{path}'")
+        os.replace(tmp_path, path)
+
+
+def atlas_path(folder: str, head: int) -> str:
+    return os.path.join(folder, f"{head}{ATLAS_EXTENSION}")
+
+
+def read_atlas_index(folder: str, head: int) -> bytes | None:
+    """Header and slot index of an atlas, without mapping the sprite data."""
+    path = atlas_path(folder, head)
+    try:
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            magic, version, slots = _HEADER.unpack(header)
+            if magic != ATLAS_MAGIC or version != ATLAS_VERSION:
+                raise ValueError(f"Not a v{ATLAS_VERSION} sprite atlas: '{path}'")
+            return header + f.read(slots * _SLOT.size)
+    except FileNotFoundError:
+        return None
+
+
+def index_bodies(index: bytes) -> list[int]:
+    slots = _SLOT.iter_unpack(memoryview(index)[_HEADER.size:])
+    return [body for body, (_, length) in enumerate(slots, 1) if length > 0]
+
+
+def read_atlas(folder: str, head: int) -> SpriteAtlas | None:
+    path = atlas_path(folder, head)
+    return SpriteAtlas(path) if os.path.isfile(path) else None
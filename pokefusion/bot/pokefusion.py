@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from collections.abc import Awaitable, Callable, Sequence
 from datetime import datetime
@@ -15,8 +16,9 @@ from pokefusion.assetmanager import AssetManager
 from pokefusion.bot.context import Context
 from pokefusion.configmanager import BotConfig
 from pokefusion.db.models import Server, Settings, User
-from pokefusion.fusionapi import FusionClient, SpriteClient
-from pokefusion.imagelib import get_dominant_color
+from pokefusion.fusionapi import FUSION_TABLES, FusionClient, FusionTables, SpriteClient
+from pokefusion.services.filter_cache import FilterCache
+from pokefusion.services.render import RenderCache, RenderService
 from pokefusion.services.totem import TotemService
 
 logger = logging.getLogger(__name__)
@@ -49,6 +51,11 @@ class PokeFusion(commands.Bot):
         self.fusion_client: FusionClient = FusionClient()
         self.sprite_client: SpriteClient = SpriteClient()
         self.totem_service = TotemService(self.fusion_client)
+        self.render_cache = RenderCache(config.render_cache.max_size, config.render_cache.disk_path)
+        self.filter_cache: FilterCache | None = None
+        if config.filter_cache.path is not None:
+            self.filter_cache = FilterCache(config.filter_cache.path, config.filter_cache.max_size)
+        self.render_service = RenderService(config.render, self.render_cache, self.filter_cache)
         self._before_invokes: list[Callable[[Context], Awaitable[Any]]] = []
         self._after_invokes: list[Callable[[Context], Awaitable[Any]]] = []
         self.after_invoke: Callable[Callable[[Context], Awaitable[Any]], None] = lambda _: None
@@ -116,16 +123,30 @@ class PokeFusion(commands.Bot):
             logger.warning(f"Invalid main color {self.config.main_color!r}, deriving it from the avatar")
 
         try:
-            rgb = get_dominant_color(AssetManager.get_avatar_path(self.config.environment), normalize=True)
+            rgb = AssetManager.get_avatar(self.config.environment).color
             return Color.from_rgb(*rgb)
         except OSError as e:
             logger.error(f"Couldn't load the {self.config.environment} avatar: {e}")
             return Color.light_grey()
 
+    async def reload_assets(self) -> FusionTables:
+        # Results created before the swap keep their own snapshot of the tables
+        old_version = FUSION_TABLES.get().version if FUSION_TABLES.loaded else None
+        tables = await asyncio.to_thread(FUSION_TABLES.reload)
+        logger.info(f"Reloaded fusion tables: {old_version} -> {tables.version}")
+        await asyncio.to_thread(self.render_cache.drop_stale, tables.version)
+        return tables
+
     async def get_context(self, origin: Message | Interaction, /, *, cls=Context) -> Context:
         return await super().get_context(origin, cls=cls)
 
     async def setup_hook(self) -> None:
+        await asyncio.to_thread(AssetManager.preload_static, self.config.environment)
+        # Loaded on first use otherwise, which would block the event loop during the first command
+        await asyncio.to_thread(FUSION_TABLES.get)
+        if self.filter_cache is not None:
+            await asyncio.to_thread(self.filter_cache.scan)
+
         for extension in self.CORE_EXTENSIONS:
             logger.info(f"Loading core extension '{extension}'")
             await self.load_extension(extension)
@@ -137,6 +158,10 @@ class PokeFusion(commands.Bot):
             logger.info(f"Loading extension '{extension}'")
             await self.load_extension(extension)
 
+    async def close(self) -> None:
+        self.render_service.shutdown()
+        await super().close()
+
     @staticmethod
     async def log_command(ctx: Context) -> None:
         logger.info(f"{ctx.message.content} in #{ctx.channel} ({ctx.guild}) by {ctx.author}")
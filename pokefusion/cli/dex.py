@@ -3,8 +3,6 @@ import logging
 import typer
 
 from pokefusion.cli.context import Context
-from pokefusion.scripts.generate_infinitedex import generate_infinitedex
-from pokefusion.scripts.generate_pokedex import generate_pokedex
 
 logger = logging.getLogger(__name__)
 dex_app = typer.Typer(no_args_is_help=True)
@@ -12,7 +10,21 @@ dex_app = typer.Typer(no_args_is_help=True)
 
 @dex_app.command()
 def build() -> None:
+    from pokefusion.scripts.compile_dex import compile_dex
+    from pokefusion.scripts.generate_infinitedex import generate_infinitedex
+    from pokefusion.scripts.generate_pokedex import generate_pokedex
+
     Context()
     logger.info(f"Building dex files")
     generate_pokedex()
     generate_infinitedex()
+    compile_dex()
+
+
+@dex_app.command("compile")
+def compile_artifact() -> None:
+    from pokefusion.scripts.compile_dex import compile_dex
+
+    Context()
+    logger.info("Compiling dex artifact")
+    compile_dex()
@@ -1,9 +1,6 @@
 import logging
 
-import discord
-from discord import Intents
-
-from pokefusion.bot.pokefusion import PokeFusion
+from pokefusion.assetmanager import AssetManager
 from pokefusion.cli.context import Context
 from pokefusion.db.database import connect_database, database
 
@@ -11,6 +8,12 @@ logger = logging.getLogger(__name__)
 
 
 def run_bot() -> None:
+    # discord.py and the bot are imported here so that other CLI commands don't pay for them
+    import discord
+    from discord import Intents
+
+    from pokefusion.bot.pokefusion import PokeFusion
+
     ctx = Context()
 
     done, pending = ctx.migration_service.list()
@@ -26,6 +29,16 @@ def run_bot() -> None:
         logger.warning(f"Run 'uv run main.py migrations apply' first")
         return
 
+    unpacked = AssetManager.get_unpacked_fusion_folders()
+    if unpacked:
+        logger.error("Cannot start the bot because some fusion sprites aren't packed into atlases:")
+
+        for folder in unpacked:
+            logger.error(f"- {folder}")
+
+        logger.error("Run 'uv run main.py tools pack_atlases' first")
+        return
+
     connect_database(ctx.config.database)
 
     intents = Intents.default()
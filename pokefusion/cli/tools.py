@@ -4,11 +4,15 @@ import time
 
 import typer
 
+from pokefusion.assetmanager import AssetManager
 from pokefusion.cli.context import Context
+from pokefusion.configmanager import ConfigManager
 from pokefusion.scripts.clean_assets import clean_assets_folder, clean_output_folder
 from pokefusion.scripts.git import restore_deleted_files
 from pokefusion.scripts.import_assets import get_pack_path, import_autogen_sprites, import_custom_sprites, \
-    import_egg_sprites, is_valid_pack, move_to_assets, save_diff
+    import_egg_sprites, import_fusion_colors, is_valid_pack, move_config_to_assets, move_to_assets, \
+    pack_fusion_folders, save_diff, update_custom_sprites
+from pokefusion.scripts.importtime import report_import_time
 
 logger = logging.getLogger(__name__)
 tools_app = typer.Typer(no_args_is_help=True)
@@ -36,16 +40,36 @@ def import_all(pack_name: str) -> None:
     _import_autogen()
     _import_custom(pack_path)
     _import_eggs(pack_path)
+    _import_colors(from_output=True)
     _save_diff()
     _cleanup_assets()
     _import_to_assets()
     logger.info("Restoring tracked files deleted during cleanup")
     restore_deleted_files()
+    _compile_dex()
     elapsed_time = time.perf_counter() - start_time
     logger.info(f"Total runtime is {elapsed_time:.2f} seconds")
     logger.info("Don't forget to update fusionapi.PREVIOUS_MAX_ID if necessary")
 
 
+@import_app.command("update")
+def import_update(pack_name: str) -> None:
+    logger.info(f"Updating custom sprites from '{pack_name}'")
+    start_time = time.perf_counter()
+    heads = update_custom_sprites(pack_name)
+    if heads is None:
+        return
+
+    if heads:
+        logger.info(f"Computing fusion colors of {len(heads)} heads")
+        import_fusion_colors(from_output=False, heads=heads)
+    logger.info("Moving fusion tables to config folder")
+    move_config_to_assets()
+    _compile_dex()
+    elapsed_time = time.perf_counter() - start_time
+    logger.info(f"Total runtime is {elapsed_time:.2f} seconds")
+
+
 @import_app.command("autogen")
 def import_autogen() -> None:
     _import_autogen()
@@ -61,6 +85,11 @@ def import_eggs(pack_name: str) -> None:
     _import_eggs(pack_name)
 
 
+@import_app.command("colors")
+def import_colors() -> None:
+    _import_colors(from_output=False)
+
+
 @import_app.command("to_assets")
 def import_to_assets() -> None:
     _import_to_assets()
@@ -71,6 +100,35 @@ def save_diff_cmd() -> None:
     _save_diff()
 
 
+@tools_app.command("pack_atlases")
+def pack_atlases_cmd() -> None:
+    for folder in (AssetManager.FUSIONS_AUTOGEN_DIR, AssetManager.FUSIONS_CUSTOM_DIR):
+        logger.info(f"Packing '{folder}' into atlases")
+        pack_fusion_folders(folder)
+
+
+@tools_app.command("check_native_sprites")
+def check_native_sprites_cmd(sample: int = 500, seed: int | None = None) -> None:
+    from pokefusion.scripts.native_sprites import check_native_sprites
+
+    logger.info("Checking that native autogen sprites render like upscaled ones")
+    if not check_native_sprites(AssetManager.FUSIONS_AUTOGEN_DIR, sample, seed):
+        raise typer.Exit(1)
+
+
+@tools_app.command("filter_cache")
+def filter_cache_cmd(scale: int = 3, prune: bool = True) -> None:
+    from pokefusion.scripts.filter_cache import generate_filter_cache
+
+    logger.info("Generating filter cache")
+    generate_filter_cache(ConfigManager.get_bot_config().filter_cache, scale, prune)
+
+
+@tools_app.command("importtime")
+def importtime_cmd(module: str = "pokefusion.bot.pokefusion", top: int = 25) -> None:
+    report_import_time(module, top)
+
+
 @cleanup_app.command("output")
 def cleanup_output_cmd() -> None:
     _cleanup_output()
@@ -97,6 +155,11 @@ def _import_eggs(pack_name: str) -> None:
     import_egg_sprites(pack_name)
 
 
+def _import_colors(from_output: bool) -> None:
+    logger.info("Computing fusion colors")
+    import_fusion_colors(from_output)
+
+
 def _import_to_assets() -> None:
     logger.info("Moving files to assets folder")
     move_to_assets()
@@ -107,6 +170,13 @@ def _save_diff() -> None:
     save_diff()
 
 
+def _compile_dex() -> None:
+    from pokefusion.scripts.compile_dex import compile_dex
+
+    logger.info("Compiling dex artifact")
+    compile_dex()
+
+
 def _cleanup_output() -> None:
     logger.info("Cleaning up output folder")
     start_time = time.perf_counter()
@@ -1,14 +1,14 @@
-import os
 from enum import Enum, IntEnum, auto
+from io import BytesIO
 from typing import Any, NamedTuple
 
 from discord import Color, Embed, File
 
-from pokefusion import imagelib
-from pokefusion.assetmanager import AssetManager
+from pokefusion.assetmanager import AssetManager, StaticAsset
 from pokefusion.bot.context import Context, Reply
-from pokefusion.fusionapi import FusionResult, Sprite
-from pokefusion.imagelib import FilterType, PathOrBytes
+from pokefusion.fusionapi import FusionResult
+from pokefusion.imagelib import PathOrBytes
+from pokefusion.services.guess import GuessRound
 
 
 class WeekDay(IntEnum):
@@ -41,6 +41,11 @@ class EmbedAttachment(NamedTuple):
     type: AttachmentType = AttachmentType.DEFAULT
 
 
+def static_attachment(asset: StaticAsset, type_: AttachmentType = AttachmentType.DEFAULT,
+                      filename: str | None = None) -> EmbedAttachment:
+    return EmbedAttachment(asset.buffer(), filename or asset.filename, type_)
+
+
 class EmbedFooter(NamedTuple):
     text: Any = None
     icon_url: Any = None
@@ -93,60 +98,49 @@ def footer_embed(ctx: Context, **kwargs) -> tuple[Embed, list[File]]:
     return base_embed(ctx, footer=EmbedFooter(f"Requested by {ctx.author.display_name}"), **kwargs)
 
 
-def fusion_embed(ctx: Context, result: FusionResult, **kwargs) -> tuple[Embed, list[File]]:
-    color = Color.from_rgb(*imagelib.get_dominant_color(result.path))
+async def fusion_embed(ctx: Context, result: FusionResult, **kwargs) -> tuple[Embed, list[File]]:
+    rendered = await ctx.bot.render_service.render_fusion(result)
+    color = Color.from_rgb(*rendered.color)
     head, body = result.head, result.body
     filename_fusions = f"fusions_{str(head.dex_id).zfill(3)}_{str(body.dex_id).zfill(3)}.png"
     filename_eggs = f"eggs_{str(head.dex_id).zfill(3)}_{str(body.dex_id).zfill(3)}.png"
-    combined_fusions = imagelib.merge_images(result.path, result.swap().path, pixel_gap=50, crop_bbox=True)
-    combined_eggs = imagelib.merge_images(result.egg_path, result.swap().egg_path, pixel_gap=5, crop_bbox=True)
-    fusions = EmbedAttachment(fp=combined_fusions, filename=filename_fusions, type=AttachmentType.IMAGE)
-    eggs = EmbedAttachment(fp=combined_eggs, filename=filename_eggs, type=AttachmentType.THUMBNAIL)
+    fusions = EmbedAttachment(fp=BytesIO(rendered.fusions), filename=filename_fusions, type=AttachmentType.IMAGE)
+    eggs = EmbedAttachment(fp=BytesIO(rendered.eggs), filename=filename_eggs, type=AttachmentType.THUMBNAIL)
     head_text = f"{result.head.species} #{result.head.dex_id}" + ("\n\n🆕" if result.is_new else "")
-    body_text = f"{result.body.species} #{result.body.dex_id}" + ("\n\n🆕" if result.swap().is_new else "")
+    swapped = result.swap()
+    body_text = f"{result.body.species} #{result.body.dex_id}" + ("\n\n🆕" if swapped.is_new else "")
+    if not swapped.has_sprite:
+        # Rendered with a placeholder next to the fusion
+        kwargs.setdefault("description", f"There is no sprite for {swapped.head.species}/{swapped.body.species}.")
     fields = (EmbedField("Head", head_text), EmbedField("Body", body_text))
     return footer_embed(ctx, color=color, fields=fields, attachments=(fusions, eggs), **kwargs)
 
 
-def guess_fusion_embed(ctx: Context, result: FusionResult, filters: list[FilterType] = None,
-                       title: str = "Guess the fusion!") -> tuple[Embed, list[File]]:
-    color = Color.from_rgb(*imagelib.get_dominant_color(result.path))
+def guess_fusion_embed(ctx: Context, guess_round: GuessRound, title: str = "Guess the fusion!") -> \
+        tuple[Embed, list[File]]:
     fields = (EmbedField("Head", "?"), EmbedField("Body", "?"))
+    fusion = EmbedAttachment(fp=guess_round.fp, filename="guess.png", type=AttachmentType.IMAGE)
+    return base_embed(ctx, title=title, color=Color.from_rgb(*guess_round.color), fields=fields,
+                      attachments=(fusion,), footer=EmbedFooter("Type <Pokémon> <Pokémon>"))
 
-    filtered = result.path
-    if filters:
-        for filter_ in filters:
-            filtered = imagelib.apply_filter(filtered, filter_type=filter_)
-
-    fusion = EmbedAttachment(fp=filtered, filename="guess.png", type=AttachmentType.IMAGE)
-    return base_embed(ctx, title=title, color=color, fields=fields, attachments=(fusion,),
-                      footer=EmbedFooter("Type <Pokémon> <Pokémon>"))
 
-
-def guess_filter_embed(ctx: Context, filters: list[FilterType], sprite: Sprite, title: str = "Guess the Pokémon!") -> \
+def guess_filter_embed(ctx: Context, guess_round: GuessRound, title: str = "Guess the Pokémon!") -> \
         tuple[Embed, list[File]]:
-    filtered = imagelib.apply_filter(sprite.path, filter_type=filters[0], scale=3)
-
-    for filter_ in filters[1:]:
-        filtered = imagelib.apply_filter(filtered, filter_type=filter_)
-
-    attachment = EmbedAttachment(filtered, "guess.png", AttachmentType.IMAGE)
+    attachment = EmbedAttachment(guess_round.fp, "guess.png", AttachmentType.IMAGE)
     return base_embed(ctx, title=title, attachments=(attachment,), footer=EmbedFooter("Type <Pokémon>"))
 
 
 def description_embed(ctx: Context, description: str, title: str = "Guess the Pokémon!") -> tuple[Embed, list[File]]:
-    attachment = EmbedAttachment(os.path.join(AssetManager.MISC_DIR, "Substitute.png"), "Substitute.png",
-                                 AttachmentType.THUMBNAIL)
-    color = Color.from_rgb(*imagelib.get_dominant_color(attachment.fp, normalize=True))
+    substitute = AssetManager.get_misc("Substitute.png")
+    attachment = static_attachment(substitute, AttachmentType.THUMBNAIL)
+    color = Color.from_rgb(*substitute.color)
     return base_embed(ctx, title=title, description=description, color=color, attachments=(attachment,),
                       footer=EmbedFooter("Type <Pokémon>"))
 
 
 def birthday_embed(ctx: Context, color: Color, upload_attachment: bool = True) -> tuple[Embed, list[File]]:
     if upload_attachment:
-        attachments = (
-            EmbedAttachment(os.path.join(AssetManager.MISC_DIR, "BirthdayPresent.png"), "BirthdayPresent.png",
-                            AttachmentType.THUMBNAIL),)
+        attachments = (static_attachment(AssetManager.get_misc("BirthdayPresent.png"), AttachmentType.THUMBNAIL),)
     else:
         attachments = ()
     footer = EmbedFooter(f"Happy birthday {ctx.author.display_name}!")
@@ -157,9 +151,7 @@ def birthday_embed(ctx: Context, color: Color, upload_attachment: bool = True) -
 
 def christmas_embed(ctx: Context, color: Color, upload_attachment: bool = True) -> tuple[Embed, list[File]]:
     if upload_attachment:
-        attachments = (
-            EmbedAttachment(os.path.join(AssetManager.MISC_DIR, "ChristmasPresent.png"), "ChristmasPresent.png",
-                            AttachmentType.THUMBNAIL),)
+        attachments = (static_attachment(AssetManager.get_misc("ChristmasPresent.png"), AttachmentType.THUMBNAIL),)
     else:
         attachments = ()
     footer = EmbedFooter(f"Happy Holidays!")
@@ -169,9 +161,9 @@ def christmas_embed(ctx: Context, color: Color, upload_attachment: bool = True)
 
 
 async def guess_prompt(ctx: Context, description: str, delete: bool = False) -> Reply:
-    attachment = EmbedAttachment(os.path.join(AssetManager.MISC_DIR, "Unknown.png"), "Unknown.png",
-                                 AttachmentType.THUMBNAIL)
-    color = Color.from_rgb(*imagelib.get_dominant_color(attachment.fp, normalize=True))
+    unknown = AssetManager.get_misc("Unknown.png")
+    attachment = static_attachment(unknown, AttachmentType.THUMBNAIL)
+    color = Color.from_rgb(*unknown.color)
     footer = EmbedFooter("Type yes or no.")
     embed, files = base_embed(ctx, description=description, color=color, footer=footer, attachments=(attachment,))
     prompt = await ctx.send(embed=embed, files=files)
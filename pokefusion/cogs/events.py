@@ -9,6 +9,7 @@ from pokefusion.bot.context import Context
 from pokefusion.bot.pokefusion import PokeFusion
 from pokefusion.db.models import Server
 from pokefusion.enums import Environment
+from pokefusion.services.render import RenderQueueFull
 
 logger = logging.getLogger(__name__)
 
@@ -68,6 +69,12 @@ class Events(commands.Cog):
             log = f"[{ctx.prefix}{ctx.command.qualified_name}] {log}"
 
         original = getattr(error, "original", error)
+
+        if isinstance(original, RenderQueueFull):
+            logger.warning(log)
+            await ctx.send("The bot is busy, please try again in a few seconds.")
+            return
+
         logger.error(log, exc_info=original)
 
         if self.bot.config.environment is not Environment.PROD:
@@ -17,7 +17,12 @@ class Fusion(commands.Cog):
 
     async def _send_embed(self, ctx: Context, result: FusionResult, title: str) -> None:
         self.last_queries[ctx.channel] = result
-        embed, files = fusion_embed(ctx, result, title=title)
+        if not result.has_sprite:
+            # Empty spritesheet cells aren't stored, there is nothing to show
+            await ctx.send(f"There is no sprite for {result.head.species}/{result.body.species}.")
+            return
+
+        embed, files = await fusion_embed(ctx, result, title=title)
         await ctx.send(embed=embed, files=files)
 
     @commands.command(aliases=["f"])
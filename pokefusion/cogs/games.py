@@ -3,7 +3,7 @@ import random
 from collections import defaultdict
 
 from discord import Message, TextChannel
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 from pokefusion import utils
 from pokefusion.bot.context import Context
@@ -11,8 +11,8 @@ from pokefusion.bot.pokefusion import PokeFusion
 from pokefusion.configmanager import ConfigManager
 from pokefusion.enums import Language
 from pokefusion.fusionapi import FusionResult, Sprite
-from pokefusion.imagelib import FilterType
 from pokefusion.pokeapi import PokeApiClient, PokeApiResult
+from pokefusion.services.guess import GUESS_GAMES, GuessRoundPool
 from .cogutils import description_embed, guess_filter_embed, guess_fusion_embed
 
 logger = logging.getLogger(__name__)
@@ -52,12 +52,41 @@ class Games(commands.Cog):
         self.hints_counter: defaultdict[TextChannel, int] = defaultdict(int)
         self.last_shuffles: defaultdict[TextChannel, list[tuple[str, str]]] = defaultdict(list)
         self._pokemon_names: dict[Language, list[str]] = {}
+        self.guess_rounds = GuessRoundPool(self.fusion_client, self.sprite_client, bot.render_service,
+                                           bot.config.render.guess_pool_size)
 
     def cog_load(self) -> None:
         self._pokemon_names = load_pokemon_names()
         num_langs, num_entries = len(self._pokemon_names), len(self._pokemon_names[Language.DEFAULT])
         logger.info(f"Loaded {num_entries} Pokémon names in {num_langs} languages")
 
+        if self.guess_rounds.size > 0:
+            self.refill_guess_rounds.start()
+
+    def cog_unload(self) -> None:
+        self.refill_guess_rounds.cancel()
+
+    @tasks.loop(seconds=5)
+    async def refill_guess_rounds(self) -> None:
+        try:
+            rendered = await self.guess_rounds.refill()
+        except Exception as e:
+            logger.warning(f"Couldn't refill guess rounds: {e}")
+            return
+
+        if rendered:
+            logger.debug(f"Pre-rendered {rendered} guess rounds, pool depths: {self.guess_rounds.depths()}")
+
+    async def _start_round(self, ctx: Context, game: str) -> None:
+        guess_round = await self.guess_rounds.take(game)
+        self.last_answers[ctx.channel] = guess_round.answer
+
+        if GUESS_GAMES[game].fusion:
+            embed, files = guess_fusion_embed(ctx, guess_round)
+        else:
+            embed, files = guess_filter_embed(ctx, guess_round)
+        await ctx.send(embed=embed, files=files)
+
     @commands.Cog.listener()
     async def on_message(self, message: Message) -> None:
         channel = message.channel
@@ -102,88 +131,47 @@ class Games(commands.Cog):
 
     @guess.command(name="silhouette", aliases=["sil"])
     async def guess_silhouette(self, ctx: Context):
-        sprite = self.sprite_client.get_sprite("?")
-        self.last_answers[ctx.channel] = sprite
-
-        embed, files = guess_filter_embed(ctx, [FilterType.SILHOUETTE], sprite)
-        await ctx.send(embed=embed, files=files)
+        await self._start_round(ctx, "silhouette")
 
     @guess.command(name="blur")
     async def guess_blur(self, ctx: Context) -> None:
-        sprite = self.sprite_client.get_sprite("?")
-        self.last_answers[ctx.channel] = sprite
-
-        embed, files = guess_filter_embed(ctx, [FilterType.GAUSSIAN_BLUR], sprite)
-        await ctx.send(embed=embed, files=files)
+        await self._start_round(ctx, "blur")
 
     @guess.command(name="pixel")
     async def guess_pixel(self, ctx: Context) -> None:
-        sprite = self.sprite_client.get_sprite("?")
-        self.last_answers[ctx.channel] = sprite
-
-        embed, files = guess_filter_embed(ctx, [FilterType.PIXELATE], sprite)
-        await ctx.send(embed=embed, files=files)
+        await self._start_round(ctx, "pixel")
 
     @guess.command(name="grayscale", aliases=["gray", "grey", "greyscale"])
     async def guess_grayscale(self, ctx: Context) -> None:
-        sprite = self.sprite_client.get_sprite("?")
-        self.last_answers[ctx.channel] = sprite
-
-        embed, files = guess_filter_embed(ctx, [FilterType.GRAYSCALE], sprite)
-        await ctx.send(embed=embed, files=files)
+        await self._start_round(ctx, "grayscale")
 
     @guess.command(name="edge", aliases=["edges"])
     async def guess_edge(self, ctx: Context) -> None:
-        sprite = self.sprite_client.get_sprite("?")
-        self.last_answers[ctx.channel] = sprite
-
-        embed, files = guess_filter_embed(ctx, [FilterType.EDGE], sprite)
-        await ctx.send(embed=embed, files=files)
+        await self._start_round(ctx, "edge")
 
     @guess.command(name="box")
     async def guess_box(self, ctx: Context) -> None:
-        sprite = self.sprite_client.get_sprite("?")
-        self.last_answers[ctx.channel] = sprite
-
-        embed, files = guess_filter_embed(ctx, [FilterType.BOX], sprite)
-        await ctx.send(embed=embed, files=files)
+        await self._start_round(ctx, "box")
 
     @guess.command(name="swirl", aliases=["sw"])
     async def guess_swirl(self, ctx: Context) -> None:
-        sprite = self.sprite_client.get_sprite("?")
-        self.last_answers[ctx.channel] = sprite
-
-        embed, files = guess_filter_embed(ctx, [FilterType.SWIRL], sprite)
-        await ctx.send(embed=embed, files=files)
+        await self._start_round(ctx, "swirl")
 
     @guess.command(name="pixelblur", aliases=["pb"])
     async def guess_pixelblur(self, ctx: Context) -> None:
-        sprite = self.sprite_client.get_sprite("?")
-        self.last_answers[ctx.channel] = sprite
-
-        embed, files = guess_filter_embed(ctx, [FilterType.GAUSSIAN_BLUR, FilterType.PIXELATE], sprite)
-        await ctx.send(embed=embed, files=files)
+        await self._start_round(ctx, "pixelblur")
 
     @guess.command(name="fusion")
     async def guess_fusion(self, ctx: Context):
-        result = self.fusion_client.fusion()
-        self.last_answers[ctx.channel] = result
-        embed, files = guess_fusion_embed(ctx, result)
-        await ctx.send(embed=embed, files=files)
+        await self._start_round(ctx, "fusion")
 
     @guess.command(name="pixelfusion", aliases=["pf"])
     async def guess_pixelfusion(self, ctx: Context):
-        result = self.fusion_client.fusion()
-        self.last_answers[ctx.channel] = result
-        embed, files = guess_fusion_embed(ctx, result, filters=[FilterType.PIXELATE])
-        await ctx.send(embed=embed, files=files)
+        await self._start_round(ctx, "pixelfusion")
 
     @guess.command(name="fusionbox", aliases=["fb"])
     async def guess_fusionbox(self, ctx: Context):
-        result = self.fusion_client.fusion()
-        self.last_answers[ctx.channel] = result
-        embed, files = guess_fusion_embed(ctx, result, filters=[FilterType.BOX])
-        await ctx.send(embed=embed, files=files)
+        await self._start_round(ctx, "fusionbox")
 
     # @guess.command(name="test")
     # async def guess_test(self, ctx: Context):
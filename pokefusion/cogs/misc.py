@@ -1,7 +1,8 @@
+from io import BytesIO
+
 import discord
 from discord.ext import commands
 
-from pokefusion import imagelib
 from pokefusion.bot.pokefusion import PokeFusion
 from pokefusion.bot.context import Context, Reply
 from .cogutils import guess_prompt
@@ -17,8 +18,8 @@ class Misc(commands.Cog):
         sprite = self.client.get_sprite(species)
         if sprite.found:
             filename = f"sprites_{sprite.lookup.dex_id:03}_{sprite.lookup.species}.png"
-            sprites = imagelib.merge_images(sprite.path, sprite.path_shiny, pixel_gap=5)
-            f = discord.File(fp=sprites, filename=filename)
+            sprites = await self.bot.render_service.render_shiny_sprite(sprite.path, sprite.path_shiny)
+            f = discord.File(fp=BytesIO(sprites), filename=filename)
             await ctx.send(file=f)
         else:
             desc = f"Did you mean: `{ctx.prefix}{ctx.invoked_with} {sprite.lookup.guess}`"
@@ -16,7 +16,7 @@ from pokefusion.bot.converters import ModuleConverter
 from pokefusion.bot.pokefusion import PokeFusion
 from pokefusion.db import models
 from pokefusion.db.models import Settings, User
-from .cogutils import AttachmentType, EmbedAttachment, embed_factory
+from .cogutils import AttachmentType, embed_factory, static_attachment
 from .scheduler import NOTIF_CHANNELS
 
 logger = logging.getLogger(__name__)
@@ -121,9 +121,9 @@ class Owner(commands.Cog, command_attrs=dict(hidden=True)):
         if free_rerolls > 0:
             plural = "s" if free_rerolls > 1 else ""
             description += f"⚠️ All Totems have been reset️. As compensation, everyone received **+{free_rerolls} free reroll{plural}**! Check how many you have with `{ctx.prefix}fru`"
-        avatar = EmbedAttachment(AssetManager.get_avatar_path(self.bot.config.environment), "avatar.png",
-                                 AttachmentType.THUMBNAIL)
-        preview, files = embed_factory(title=title, description=description, attachments=(avatar,),
+        avatar = AssetManager.get_avatar(self.bot.config.environment)
+        thumbnail = static_attachment(avatar, AttachmentType.THUMBNAIL, "avatar.png")
+        preview, files = embed_factory(title=title, description=description, attachments=(thumbnail,),
                                        color=ctx.bot.main_color)
         await ctx.send(embed=preview, files=files)
 
@@ -142,11 +142,57 @@ class Owner(commands.Cog, command_attrs=dict(hidden=True)):
             for channel_id in NOTIF_CHANNELS:
                 channel = self.bot.get_channel(channel_id)
                 if channel:
-                    embed, files = embed_factory(title=title, description=description, attachments=(avatar,),
+                    thumbnail = static_attachment(avatar, AttachmentType.THUMBNAIL, "avatar.png")
+                    embed, files = embed_factory(title=title, description=description, attachments=(thumbnail,),
                                                  color=ctx.bot.main_color)
                     await channel.send(embed=embed, files=files)
         await prompt.edit(embed=embed)
 
+    @commands.command(aliases=["ra"])
+    async def reload_assets(self, ctx: Context) -> None:
+        tables = await self.bot.reload_assets()
+        await ctx.send(f"Reloaded fusion tables (version `{tables.version}`, {len(tables.custom_fusions)} custom fusions).")
+
+    @commands.command(aliases=["rs"])
+    async def render_stats(self, ctx: Context) -> None:
+        service = self.bot.render_service.stats()
+        stats = self.bot.render_cache.stats()
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        hit_rate = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0
+        await ctx.send(
+            "```asciidoc\n"
+            f"Backend   :: {service['backend']} ({service['workers']} workers, {service['restarts']} restarts)\n"
+            f"Pending   :: {service['pending']}/{service['max_pending']}\n"
+            f"Jobs      :: {service['jobs']} (+{service['coalesced']} coalesced, avg {service['avg_time'] * 1000:.1f} ms, max {service['max_time'] * 1000:.1f} ms)\n"
+            f"Entries   :: {stats['entries']}\n"
+            f"Size      :: {stats['size'] / 1024 ** 2:.2f}/{stats['max_size'] / 1024 ** 2:.2f} MB\n"
+            f"Hits      :: {stats['hits']} (+{stats['disk_hits']} from disk)\n"
+            f"Misses    :: {stats['misses']}\n"
+            f"Evictions :: {stats['evictions']}\n"
+            f"Hit rate  :: {hit_rate:.1%}\n"
+            f"{self._filter_cache_stats()}"
+            "```"
+        )
+
+    def _filter_cache_stats(self) -> str:
+        if self.bot.filter_cache is None:
+            return "Filters   :: disabled\n"
+
+        stats = self.bot.filter_cache.stats()
+        return (f"Filters   :: {stats['size'] / 1024 ** 2:.2f}/{stats['max_size'] / 1024 ** 2:.2f} MB, "
+                f"{stats['hits']} hits, {stats['misses']} misses\n")
+
+    @commands.command(aliases=["gp"])
+    async def guess_pool(self, ctx: Context) -> None:
+        games = self.bot.get_cog("Games")
+        if games is None:
+            await ctx.send("Games extension is not loaded.")
+            return
+
+        pool = games.guess_rounds
+        depths = "\n".join(f"{game:<11} :: {depth}/{pool.size}" for game, depth in pool.depths().items())
+        await ctx.send(f"```asciidoc\n{depths}\n\nHits        :: {pool.hits}\nMisses      :: {pool.misses}\n```")
+
     @commands.command()
     async def say(self, ctx: Context, *, message: str) -> None:
         await ctx.send(message)
@@ -1,4 +1,6 @@
+import asyncio
 import logging
+import os
 from datetime import datetime, time
 from zoneinfo import ZoneInfo
 
@@ -6,7 +8,8 @@ from discord.ext import commands, tasks
 
 from pokefusion.assetmanager import AssetManager
 from pokefusion.bot.pokefusion import PokeFusion
-from .cogutils import AttachmentType, EmbedAttachment, WeekDay, embed_factory
+from pokefusion.configmanager import ConfigManager
+from .cogutils import AttachmentType, WeekDay, embed_factory, static_attachment
 
 logger = logging.getLogger(__name__)
 
@@ -20,19 +23,58 @@ NOTIF_CHANNELS = [
     1374426505387704370,  # Jinai
     1398068543253123326,  # Serong
 ]
+ASSET_WATCH_INTERVAL = 30  # seconds
+
+type AssetsState = tuple[tuple[int, int] | str | None, ...]
+
+
+def get_assets_state() -> AssetsState:
+    state = []
+    for filename in ConfigManager.ARTIFACT_TABLE_SOURCES:
+        try:
+            stat = os.stat(os.path.join(ConfigManager.CONFIG_DIR, filename))
+            state.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            state.append(None)
+    state.append(AssetManager.hash_render_sources())
+    return tuple(state)
 
 
 class Scheduler(commands.Cog):
     def __init__(self, bot: PokeFusion) -> None:
         self.bot = bot
+        self.assets_state: AssetsState | None = None
 
     def cog_load(self) -> None:
         logger.info("Scheduling initial tasks")
         self.rerall_task.start()
+        if self.bot.config.watch_assets:
+            logger.info(f"Watching fusion tables and sprites for changes every {ASSET_WATCH_INTERVAL} seconds")
+            self.asset_watch_task.start()
 
     def cog_unload(self) -> None:
         logger.info("Unscheduling initial tasks")
         self.rerall_task.cancel()
+        self.asset_watch_task.cancel()
+
+    @tasks.loop(seconds=ASSET_WATCH_INTERVAL)
+    async def asset_watch_task(self) -> None:
+        state = await asyncio.to_thread(get_assets_state)
+        if state == self.assets_state:
+            return
+
+        logger.info("Fusion tables or sprites changed on disk, reloading...")
+        try:
+            await self.bot.reload_assets()
+        except Exception as e:
+            # Files can be caught mid-write by an import, the change is retried on the next run
+            logger.error(f"Couldn't reload assets, retrying in {ASSET_WATCH_INTERVAL} seconds: {e}", exc_info=e)
+            return
+        self.assets_state = state
+
+    @asset_watch_task.before_loop
+    async def before_asset_watch(self) -> None:
+        self.assets_state = await asyncio.to_thread(get_assets_state)
 
     @tasks.loop(time=RERALL_TIME)
     async def rerall_task(self) -> None:
@@ -42,13 +84,13 @@ class Scheduler(commands.Cog):
         logger.info("Rerolling all totems...")
         self.bot.totem_service.reroll_all_totems()
         logger.info(f"Reroll done!")
-        avatar = EmbedAttachment(AssetManager.get_avatar_path(self.bot.config.environment), "avatar.png",
-                                 AttachmentType.THUMBNAIL)
+        avatar = AssetManager.get_avatar(self.bot.config.environment)
         for channel_id in NOTIF_CHANNELS:
             channel = self.bot.get_channel(channel_id)
             if channel:
+                thumbnail = static_attachment(avatar, AttachmentType.THUMBNAIL, "avatar.png")
                 embed, files = embed_factory(title="Rerall", description="All Totems have been reset!",
-                                             attachments=(avatar,), color=self.bot.main_color)
+                                             attachments=(thumbnail,), color=self.bot.main_color)
                 await channel.send(embed=embed, files=files)
 
 
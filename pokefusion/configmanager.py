@@ -1,18 +1,24 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
 import os
+import pickle
+from array import array
 from dataclasses import dataclass
 from datetime import time
 from functools import cache
 from typing import Any, Self
 
-from .enums import Environment, Language
+from .enums import Environment, Language, RenderBackend
 from .types import Dex
 from .utils import TwoWayDict, normalize
 
 type JsonDict = dict[str, Any]
+type PackedTable = tuple[array, array]
+
+logger = logging.getLogger(__name__)
 
 
 class ConfigManager:
@@ -20,19 +26,34 @@ class ConfigManager:
     CONFIG_FILE = "config.json"
     POKEDEX_FILE = "pokedex.json"
     INFINITEDEX_FILE = "infinitedex.json"
+    CUSTOM_FUSIONS_FILE = "custom_fusions.json"
+    CUSTOM_DIFF_ADDED_FILE = "custom_diff_added.json"
+    CUSTOM_DIFF_MODIFIED_FILE = "custom_diff_modified.json"
+    ARTIFACT_PATH = os.path.join("data", "dex.pickle")
+    ARTIFACT_VERSION = 2
+    ARTIFACT_DEX_SOURCES = (POKEDEX_FILE, INFINITEDEX_FILE)
+    ARTIFACT_TABLE_SOURCES = (CUSTOM_FUSIONS_FILE, CUSTOM_DIFF_ADDED_FILE, CUSTOM_DIFF_MODIFIED_FILE)
 
     @classmethod
-    @cache
-    def _load_lookup_dex(cls, filename: str) -> Dex:
+    def _normalize_dex(cls, filename: str) -> dict[str, dict[str, str]]:
         raw = cls.read_json(filename)
 
         return {
-            lang: TwoWayDict({
-                key: normalize(value) for key, value in names.items()
-            })
+            lang: {key: normalize(value) for key, value in names.items()}
             for lang, names in raw.items() if lang in Language
         }
 
+    @classmethod
+    @cache
+    def _load_lookup_dex(cls, filename: str) -> Dex:
+        artifact = cls.read_artifact()
+        if artifact is not None:
+            normalized = artifact["dex"][filename]
+        else:
+            normalized = cls._normalize_dex(filename)
+
+        return {lang: TwoWayDict(names) for lang, names in normalized.items()}
+
     @classmethod
     def get_lookup_pokedex(cls) -> Dex:
         return cls._load_lookup_dex(cls.POKEDEX_FILE)
@@ -44,9 +65,67 @@ class ConfigManager:
     @classmethod
     @cache
     def read_json(cls, filename: str) -> JsonDict:
+        return cls.load_json(filename)
+
+    @classmethod
+    def load_json(cls, filename: str) -> JsonDict:
         with open(os.path.join(cls.CONFIG_DIR, filename), "r", encoding="utf-8") as f:
             return json.load(f)
 
+    @classmethod
+    @cache
+    def hash_sources(cls) -> dict[str, str]:
+        hashes = {}
+        for filename in cls.ARTIFACT_DEX_SOURCES + cls.ARTIFACT_TABLE_SOURCES:
+            with open(os.path.join(cls.CONFIG_DIR, filename), "rb") as f:
+                hashes[filename] = hashlib.file_digest(f, "sha256").hexdigest()
+        return hashes
+
+    @classmethod
+    @cache
+    def read_artifact(cls) -> JsonDict | None:
+        try:
+            with open(cls.ARTIFACT_PATH, "rb") as f:
+                artifact = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logger.warning(f"Couldn't read the dex artifact, falling back to JSON: {e}")
+            return None
+
+        if artifact.get("version") != cls.ARTIFACT_VERSION:
+            logger.warning("Outdated dex artifact version, falling back to JSON (run 'dex compile')")
+            return None
+
+        if artifact.get("sources") != cls.hash_sources():
+            logger.warning("Stale dex artifact, falling back to JSON (run 'dex compile')")
+            return None
+
+        return artifact
+
+    @classmethod
+    def write_artifact(cls, tables: dict[str, PackedTable], bitmaps: dict[str, bytes]) -> None:
+        artifact = {
+            "version": cls.ARTIFACT_VERSION,
+            "sources": cls.hash_sources(),
+            "dex": {filename: cls._normalize_dex(filename) for filename in cls.ARTIFACT_DEX_SOURCES},
+            "tables": tables,
+            "bitmaps": bitmaps,
+        }
+
+        os.makedirs(os.path.dirname(cls.ARTIFACT_PATH), exist_ok=True)
+        temp_path = cls.ARTIFACT_PATH + ".tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cls.ARTIFACT_PATH)
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        cls.read_json.cache_clear()
+        cls.hash_sources.cache_clear()
+        cls.read_artifact.cache_clear()
+        cls._load_lookup_dex.cache_clear()
+
     @classmethod
     def get_bot_config(cls) -> BotConfig:
         return BotConfig.from_dict(cls.read_json(cls.CONFIG_FILE))
@@ -64,6 +143,10 @@ class BotConfig:
     maintenance: bool
     block_dms: bool
     main_color: str
+    watch_assets: bool
+    render: RenderConfig
+    render_cache: RenderCacheConfig
+    filter_cache: FilterCacheConfig
 
     @classmethod
     def from_dict(cls, cfg: JsonDict) -> Self:
@@ -77,7 +160,11 @@ class BotConfig:
             logging=LoggingConfig.from_dict(cfg["logging"]),
             maintenance=cfg["maintenance"],
             block_dms=cfg["block_dms"],
-            main_color=cfg["main_color"]
+            main_color=cfg["main_color"],
+            watch_assets=cfg.get("watch_assets", False),
+            render=RenderConfig.from_dict(cfg.get("render", {})),
+            render_cache=RenderCacheConfig.from_dict(cfg.get("render_cache", {})),
+            filter_cache=FilterCacheConfig.from_dict(cfg.get("filter_cache", {}))
         )
 
 
@@ -94,6 +181,55 @@ class DatabaseConfig:
         )
 
 
+@dataclass
+class RenderConfig:
+    backend: RenderBackend
+    workers: int
+    max_pending: int
+    decode_cache_size: int
+    guess_pool_size: int
+
+    @classmethod
+    def from_dict(cls, cfg: JsonDict) -> Self:
+        return cls(
+            backend=RenderBackend(cfg.get("backend", RenderBackend.THREAD)),
+            workers=cfg.get("workers") or os.cpu_count() or 1,
+            max_pending=cfg.get("max_pending", 64),
+            decode_cache_size=cfg.get("decode_cache_size", 256),
+            guess_pool_size=cfg.get("guess_pool_size", 3)
+        )
+
+
+@dataclass
+class RenderCacheConfig:
+    max_size: int
+    disk_path: str | None
+
+    @classmethod
+    def from_dict(cls, cfg: JsonDict) -> Self:
+        disk_path = cfg.get("disk_path")
+
+        return cls(
+            max_size=int(cfg.get("max_size_mb", 64) * 1024 * 1024),
+            disk_path=os.path.abspath(disk_path) if disk_path is not None else None
+        )
+
+
+@dataclass
+class FilterCacheConfig:
+    path: str | None
+    max_size: int
+
+    @classmethod
+    def from_dict(cls, cfg: JsonDict) -> Self:
+        path = cfg.get("path")
+
+        return cls(
+            path=os.path.abspath(path) if path is not None else None,
+            max_size=int(cfg.get("max_size_mb", 256) * 1024 * 1024)
+        )
+
+
 @dataclass
 class LoggingConfig:
     path: str
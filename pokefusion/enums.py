@@ -11,3 +11,8 @@ class Language(StrEnum):
     EN = auto()
     DE = auto()
     DEFAULT = FR
+
+
+class RenderBackend(StrEnum):
+    THREAD = auto()
+    PROCESS = auto()
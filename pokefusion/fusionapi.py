@@ -1,21 +1,310 @@
 from __future__ import annotations
 
+import hashlib
+import heapq
+import logging
 import os
 import random
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, Sequence
 from typing import Self
 
-from fuzzywuzzy import fuzz, process
+from fuzzywuzzy.utils import full_process
 
 from . import utils
 from .assetmanager import AssetManager
-from .configmanager import ConfigManager
+from .atlas import index_bodies, read_atlas_index
+from .configmanager import ConfigManager, PackedTable
 from .enums import Language
 from .types import Dex
 
-temp = ConfigManager.read_json("custom_diff_added.json")
-CUSTOM_DIFF_ADDED: dict[int, list[int]] = {int(key): value for key, value in temp.items()}
-temp = ConfigManager.read_json("custom_fusions.json")
-CUSTOM_FUSIONS: dict[int, list[int]] = {int(key): value for key, value in temp.items()}
+logger = logging.getLogger(__name__)
+
+
+class FusionBitmap:
+    """Dense head x body bitmap, one bit per fusion (576 x 576 bits = 41 KB)."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._bits = bytearray((size * size + 7) // 8)
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[tuple[int, int]], size: int) -> Self:
+        bitmap = cls(size)
+        for head, body in pairs:
+            bitmap.add(head, body)
+        return bitmap
+
+    @classmethod
+    def from_artifact(cls, key: str, size: int) -> Self | None:
+        artifact = ConfigManager.read_artifact()
+        if artifact is None:
+            return None
+
+        bitmap = cls(size)
+        data = artifact["bitmaps"][key]
+        if len(data) != len(bitmap._bits):
+            return None
+        bitmap._bits[:] = data
+        return bitmap
+
+    def pack(self) -> bytes:
+        return bytes(self._bits)
+
+    def _index(self, head: int, body: int) -> int | None:
+        if 1 <= head <= self.size and 1 <= body <= self.size:
+            return (head - 1) * self.size + (body - 1)
+        return None
+
+    def add(self, head: int, body: int) -> None:
+        index = self._index(head, body)
+        if index is not None:
+            self._bits[index >> 3] |= 1 << (index & 7)
+
+    def contains(self, head: int, body: int) -> bool:
+        index = self._index(head, body)
+        return index is not None and bool(self._bits[index >> 3] & (1 << (index & 7)))
+
+
+class FusionTable:
+    """Compressed sparse rows of uint16 ids, one sorted row per key."""
+
+    def __init__(self, offsets: array, values: array):
+        self.offsets = offsets
+        self.values = values
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[tuple[int, int]], size: int) -> Self:
+        rows: list[list[int]] = [[] for _ in range(size + 1)]
+        for key, value in pairs:
+            rows[key].append(value)
+
+        offsets, values = array("I", [0]), array("H")
+        for row in rows:
+            values.extend(sorted(row))
+            offsets.append(len(values))
+        return cls(offsets, values)
+
+    @classmethod
+    def from_json(cls, filename: str, size: int) -> Self:
+        raw = ConfigManager.load_json(filename)  # Not cached, the parsed lists are dropped once packed
+        return cls.from_pairs(((int(key), value) for key, values in raw.items() for value in values), size)
+
+    @classmethod
+    def from_artifact(cls, key: str, size: int) -> Self | None:
+        artifact = ConfigManager.read_artifact()
+        if artifact is not None:
+            offsets, values = artifact["tables"][key]
+            if len(offsets) == size + 2:
+                return cls(offsets, values)
+        return None
+
+    @classmethod
+    def load(cls, filename: str, size: int) -> Self:
+        table = cls.from_artifact(filename, size)
+        if table is None:
+            table = cls.from_json(filename, size)
+        return table
+
+    def pack(self) -> tuple[array, array]:
+        return self.offsets, self.values
+
+    @property
+    def size(self) -> int:
+        return len(self.offsets) - 2
+
+    def _bounds(self, key: int) -> tuple[int, int]:
+        if not 0 <= key <= self.size:
+            return 0, 0
+        return self.offsets[key], self.offsets[key + 1]
+
+    def get(self, key: int) -> array:
+        start, end = self._bounds(key)
+        return self.values[start:end]
+
+    def contains(self, key: int, value: int) -> bool:
+        start, end = self._bounds(key)
+        index = bisect_left(self.values, value, start, end)
+        return index < end and self.values[index] == value
+
+    def choice(self, key: int, rand: random.Random = random) -> int:
+        start, end = self._bounds(key)
+        if start == end:
+            raise IndexError(f"No entries for {key}")
+        return self.values[start + rand.randrange(end - start)]
+
+    def pairs(self) -> Iterator[tuple[int, int]]:
+        for key in range(self.size + 1):
+            for value in self.get(key):
+                yield key, value
+
+    def transpose(self) -> Self:
+        return type(self).from_pairs(((value, key) for key, value in self.pairs()), self.size)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def scan_atlases(folders: Sequence[str], size: int) -> tuple[FusionBitmap, list[bytes]]:
+    """Fusions that have a sprite, and a digest of each head's atlas indexes."""
+    sprites = FusionBitmap(size)
+    digests = []
+    for head in range(1, size + 1):
+        digest = hashlib.blake2b(digest_size=FusionColorTable.DIGEST_SIZE)
+        for folder in folders:
+            index = read_atlas_index(folder, head) or b""
+            digest.update(len(index).to_bytes(4, "little") + index)
+            for body in index_bodies(index) if index else ():
+                sprites.add(head, body)
+        digests.append(digest.digest())
+    return sprites, digests
+
+
+class FusionColorTable:
+    """Precomputed embed colors, with the atlas digest of each head they were computed from."""
+
+    MAGIC = b"PFCL"
+    VERSION = 1
+    DIGEST_SIZE = 16
+    HEADER = struct.Struct("<4sHH")  # magic, version, size
+
+    def __init__(self, digests: list[bytes], data: bytes, size: int, stale: frozenset[int] = frozenset()):
+        self.digests = digests
+        self.data = data
+        self.size = size
+        self.stale = stale
+
+    @classmethod
+    def read(cls, path: str, size: int) -> Self | None:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        start = cls.HEADER.size + size * cls.DIGEST_SIZE
+        if len(data) != start + size * size * 4 or cls.HEADER.unpack_from(data) != (cls.MAGIC, cls.VERSION, size):
+            return None
+        digests = [data[offset:offset + cls.DIGEST_SIZE] for offset in range(cls.HEADER.size, start, cls.DIGEST_SIZE)]
+        return cls(digests, data[start:], size)
+
+    @classmethod
+    def load(cls, path: str, size: int, digests: list[bytes]) -> Self | None:
+        table = cls.read(path, size)
+        if table is None:
+            return None
+
+        stale = frozenset(head for head, (old, new) in enumerate(zip(table.digests, digests), 1) if old != new)
+        if stale:
+            logger.warning(f"Fusion colors of {len(stale)} heads don't match their sprites, computing them when "
+                           f"rendering (run 'tools import colors')")
+        return cls(table.digests, table.data, size, stale)
+
+    def write(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.size))
+            f.write(b"".join(self.digests))
+            f.write(self.data)
+
+    def get(self, head: int, body: int) -> tuple[int, int, int] | None:
+        if not (1 <= head <= self.size and 1 <= body <= self.size) or head in self.stale:
+            return None
+        offset = ((head - 1) * self.size + (body - 1)) * 4
+        r, g, b, a = self.data[offset:offset + 4]
+        # Fusions without a sprite have no color
+        return (r, g, b) if a else None
+
+
+class FusionTables:
+    """Immutable snapshot of the custom fusion tables."""
+
+    # Derived from the custom fusions by 'dex compile', rebuilt on load without an up to date artifact
+    CUSTOM_FUSIONS_BY_BODY = "custom_fusions_by_body"
+    CUSTOM_SPRITES = "custom_sprites"
+
+    def __init__(self, custom_fusions: FusionTable, custom_fusions_by_body: FusionTable, custom_sprites: FusionBitmap,
+                 custom_diff_added: FusionTable, custom_diff_modified: FusionTable, sprites: FusionBitmap,
+                 colors: FusionColorTable | None, version: str):
+        self.custom_fusions = custom_fusions
+        self.custom_fusions_by_body = custom_fusions_by_body
+        self.custom_diff_added = custom_diff_added
+        self.custom_diff_modified = custom_diff_modified
+        self.custom_sprites = custom_sprites
+        self.sprites = sprites
+        self.colors = colors
+        self.version = version
+
+    @classmethod
+    def compile(cls, size: int) -> tuple[dict[str, PackedTable], dict[str, bytes]]:
+        """Packed tables and bitmaps to store in the dex artifact."""
+        tables = {filename: FusionTable.from_json(filename, size) for filename in ConfigManager.ARTIFACT_TABLE_SOURCES}
+        custom_fusions = tables[ConfigManager.CUSTOM_FUSIONS_FILE]
+        tables[cls.CUSTOM_FUSIONS_BY_BODY] = custom_fusions.transpose()
+        bitmaps = {cls.CUSTOM_SPRITES: FusionBitmap.from_pairs(custom_fusions.pairs(), size)}
+        packed_bitmaps = {key: bitmap.pack() for key, bitmap in bitmaps.items()}
+        return {key: table.pack() for key, table in tables.items()}, packed_bitmaps
+
+    @classmethod
+    def load(cls, size: int) -> Self:
+        hashes = ConfigManager.hash_sources()
+        # Renders are cached by version, so it also covers the sprites and colors they're made from
+        sources = [hashes[f] for f in ConfigManager.ARTIFACT_TABLE_SOURCES] + [AssetManager.hash_render_sources()]
+        version = hashlib.sha256("".join(sources).encode())
+
+        custom_fusions = FusionTable.load(ConfigManager.CUSTOM_FUSIONS_FILE, size)
+        custom_fusions_by_body = FusionTable.from_artifact(cls.CUSTOM_FUSIONS_BY_BODY, size)
+        if custom_fusions_by_body is None:
+            custom_fusions_by_body = custom_fusions.transpose()
+        custom_sprites = FusionBitmap.from_artifact(cls.CUSTOM_SPRITES, size)
+        if custom_sprites is None:
+            custom_sprites = FusionBitmap.from_pairs(custom_fusions.pairs(), size)
+        sprites, sprite_digests = scan_atlases(AssetManager.FUSION_FOLDERS, size)
+
+        return cls(
+            custom_fusions=custom_fusions,
+            custom_fusions_by_body=custom_fusions_by_body,
+            custom_sprites=custom_sprites,
+            custom_diff_added=FusionTable.load(ConfigManager.CUSTOM_DIFF_ADDED_FILE, size),
+            custom_diff_modified=FusionTable.load(ConfigManager.CUSTOM_DIFF_MODIFIED_FILE, size),
+            sprites=sprites,
+            colors=FusionColorTable.load(AssetManager.FUSION_COLORS_PATH, size, sprite_digests),
+            version=version.hexdigest()[:12],
+        )
+
+    def __repr__(self) -> str:
+        return f"<FusionTables version={self.version}, custom_fusions={len(self.custom_fusions)}>"
+
+
+class FusionTablesLoader:
+    """Loads the fusion tables on first use, reload() swaps in a new snapshot."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._tables: FusionTables | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._tables is not None
+
+    def get(self) -> FusionTables:
+        tables = self._tables
+        if tables is None:
+            with self._lock:
+                if self._tables is None:
+                    self._tables = FusionTables.load(self.size)
+                tables = self._tables
+        return tables
+
+    def reload(self) -> FusionTables:
+        with self._lock:
+            ConfigManager.clear_cache()
+            self._tables = FusionTables.load(self.size)
+            return self._tables
 
 
 class LookupResult:
@@ -44,8 +333,7 @@ class LookupResult:
     def fail(self, bad_query: str) -> Self:
         self.bad_query = bad_query
         if not bad_query.isdigit():
-            choices = self.client.get_species(self.lang)
-            self.guess, self.guess_score = process.extractOne(bad_query, choices, score_cutoff=0, scorer=fuzz.ratio)
+            self.guess, self.guess_score = self.client.suggest(bad_query, self.lang)[0]
         return self
 
     def __repr__(self) -> str:
@@ -56,14 +344,17 @@ class LookupResult:
 
 
 class FusionResult:
-    def __init__(self, head: LookupResult, body: LookupResult, head_query: str, body_query: str):
+    def __init__(self, head: LookupResult, body: LookupResult, head_query: str, body_query: str,
+                 tables: FusionTables | None = None):
         self.head = head
         self.body = body
         self.head_query = head_query
         self.body_query = body_query
+        self.tables = tables or FUSION_TABLES.get()
 
     def swap(self) -> Self:
-        return FusionResult(head=self.body, body=self.head, head_query=self.body_query, body_query=self.head_query)
+        return FusionResult(head=self.body, body=self.head, head_query=self.body_query, body_query=self.head_query,
+                            tables=self.tables)
 
     @property
     def succeeded(self) -> bool:
@@ -76,27 +367,39 @@ class FusionResult:
     @property
     def is_new(self) -> bool:
         new_autogen = self.head.dex_id > FusionClient.PREVIOUS_MAX_ID or self.body.dex_id > FusionClient.PREVIOUS_MAX_ID
-        return new_autogen or self.body.dex_id in CUSTOM_DIFF_ADDED.get(self.head.dex_id, [])
+        head, body = self.head.dex_id, self.body.dex_id
+        return (new_autogen or self.tables.custom_diff_added.contains(head, body)
+                or self.tables.custom_diff_modified.contains(head, body))
 
     @property
     def is_custom(self) -> bool:
-        filename = f"{self.head.dex_id}.{self.body.dex_id}.png"
-        custom = os.path.join(AssetManager.FUSIONS_CUSTOM_DIR, str(self.head.dex_id), filename)
-        return os.path.isfile(custom)
+        return self.tables.custom_sprites.contains(self.head.dex_id, self.body.dex_id)
 
     @property
-    def path(self) -> str | None:
+    def has_sprite(self) -> bool:
+        return self.succeeded and self.tables.sprites.contains(self.head.dex_id, self.body.dex_id)
+
+    @property
+    def color(self) -> tuple[int, int, int] | None:
+        if self.failed or self.tables.colors is None:
+            return None
+        return self.tables.colors.get(self.head.dex_id, self.body.dex_id)
+
+    @property
+    def sprite(self) -> memoryview | None:
         if self.failed:
             return None
 
-        filename = f"{self.head.dex_id}.{self.body.dex_id}.png"
-        autogen = os.path.join(AssetManager.FUSIONS_AUTOGEN_DIR, str(self.head.dex_id), filename)
-        custom = os.path.join(AssetManager.FUSIONS_CUSTOM_DIR, str(self.head.dex_id), filename)
+        head, body = self.head.dex_id, self.body.dex_id
+        if self.is_custom:
+            atlas = AssetManager.get_atlas(AssetManager.FUSIONS_CUSTOM_DIR, head)
+            sprite = atlas.get(body) if atlas is not None else None
+            if sprite is not None:
+                return sprite
+            # The tables can be ahead of the atlases, e.g. while an import is running
 
-        if os.path.isfile(custom):
-            return custom
-        else:
-            return autogen
+        atlas = AssetManager.get_atlas(AssetManager.FUSIONS_AUTOGEN_DIR, head)
+        return atlas.get(body) if atlas is not None else None
 
     @property
     def egg_path(self) -> str | None:
@@ -115,6 +418,46 @@ class FusionResult:
         return f"<FusionResult head={self.head}, body={self.body}, head_query={self.head_query}, body_query={self.body_query}>"
 
 
+class SuggestionIndex:
+    """Same results as ``process.extractOne(query, choices, scorer=fuzz.ratio)``, choices are bucketed by length."""
+
+    def __init__(self, choices: Iterable[str]):
+        self.choices: list[str] = list(choices)
+        self._buckets: dict[int, list[tuple[int, str]]] = defaultdict(list)
+        for index, choice in enumerate(self.choices):
+            processed = full_process(choice)
+            self._buckets[len(processed)].append((index, processed))
+
+    @staticmethod
+    def _max_score(len1: int, len2: int) -> int:
+        total = len1 + len2
+        if total == 0:
+            return 100
+        return 200 * min(len1, len2) // total + 1  # +1 covers rounding in fuzz.ratio
+
+    def suggest(self, query: str, limit: int = 1) -> list[tuple[str, int]]:
+        # Only needed once a lookup fails, keep it out of startup
+        from Levenshtein import ratio
+
+        processed_query = full_process(query)
+        size = len(processed_query)
+        lengths = sorted(self._buckets, key=lambda length: -self._max_score(size, length))
+
+        # Ties are broken by choice order, like max() and heapq.nlargest() in fuzzywuzzy
+        best: list[tuple[int, int]] = []  # min-heap of (score, -index)
+        for length in lengths:
+            if len(best) == limit and self._max_score(size, length) < best[0][0]:
+                break
+            for index, processed in self._buckets[length]:
+                item = (round(100 * ratio(processed_query, processed)), -index)
+                if len(best) < limit:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+
+        return [(self.choices[-neg_index], score) for score, neg_index in sorted(best, reverse=True)]
+
+
 class BaseClient:
     RANDOM_QUERIES = {"?", "."}
     MIN_ID = None
@@ -122,6 +465,9 @@ class BaseClient:
 
     def __init__(self, pokedex: Dex):
         self.pokedex = pokedex
+        self.suggestion_indexes: dict[str, SuggestionIndex] = {
+            lang: SuggestionIndex(self.get_species(lang)) for lang in pokedex
+        }
 
     @classmethod
     def get_random_id(cls):
@@ -153,40 +499,52 @@ class BaseClient:
     def get_species(self, lang: Language = Language.DEFAULT) -> list[str]:
         return [k for k in self.pokedex[lang] if not k.isdigit()]
 
+    def suggest(self, query: str, lang: Language = Language.DEFAULT, limit: int = 1) -> list[tuple[str, int]]:
+        return self.suggestion_indexes[lang].suggest(query, limit)
+
 
 class FusionClient(BaseClient):
     MIN_ID = 1
     MAX_ID = 576
     PREVIOUS_MAX_ID = 576  # TODO: update when adding sprites
+    SPRITE_SIZE = 288  # Display size, autogen sprites are stored at 96x96 and upscaled when rendered
 
     def __init__(self):
         super().__init__(ConfigManager.get_lookup_infinitedex())
 
     def fusion(self, head: str = "?", body: str = "?", lang: Language = Language.DEFAULT,
                custom_only: bool = False) -> FusionResult:
+        tables = FUSION_TABLES.get()
         head_result = self.lookup(head, lang)
 
         if custom_only and head_result.succeeded:
-            body = str(random.choice(FusionClient.get_custom_fusions(head=head_result.dex_id)))
+            body = str(tables.custom_fusions.choice(head_result.dex_id))
 
         body_result = self.lookup(body, lang)
-        return FusionResult(head_result, body_result, head, body)
+        return FusionResult(head_result, body_result, head, body, tables)
+
+    def random_fusion(self, lang: Language = Language.DEFAULT, max_tries: int = 20) -> FusionResult:
+        result = self.fusion(lang=lang)
+        for _ in range(max_tries - 1):
+            if result.has_sprite:
+                break
+            result = self.fusion(lang=lang)
+        return result
 
     def totem(self, seed: int | None = None, lang: Language = Language.DEFAULT) -> FusionResult:
         rand = random.Random(seed)
         head = rand.randint(FusionClient.MIN_ID, FusionClient.MAX_ID)
-        body = rand.choice(FusionClient.get_custom_fusions(head=head))  # Only custom fusions for Totems
+        body = FUSION_TABLES.get().custom_fusions.choice(head, rand)  # Only custom fusions for Totems
         return self.fusion(head=str(head), body=str(body), lang=lang)
 
     @staticmethod
     def get_custom_fusions(head: int = None, body: int = None) -> list[int]:
+        tables = FUSION_TABLES.get()
         fusions: list[int] = []
-        if head is not None and head in CUSTOM_FUSIONS:
-            fusions = CUSTOM_FUSIONS[head]
+        if head is not None:
+            fusions = tables.custom_fusions.get(head).tolist()
         elif body is not None:
-            for key in CUSTOM_FUSIONS:
-                if body in CUSTOM_FUSIONS[key]:
-                    fusions.append(int(key))
+            fusions = tables.custom_fusions_by_body.get(body).tolist()
         return fusions
 
 
@@ -233,3 +591,6 @@ class Sprite:
 
     def __repr__(self) -> str:
         return f"<Sprite dex_id={self.lookup.dex_id}, species={self.lookup.species}>"
+
+
+FUSION_TABLES = FusionTablesLoader(FusionClient.MAX_ID)
@@ -1,16 +1,22 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Sequence
 from enum import Enum, auto
+from functools import lru_cache
 from io import BytesIO
-from typing import BinaryIO
+from typing import TYPE_CHECKING, BinaryIO, Self
 
-import numpy as np
 from PIL import Image, ImageFile, ImageFilter
-from skimage.transform import swirl
+
+if TYPE_CHECKING:
+    import numpy as np
 
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
 type RGB = tuple[int, int, int]
 type RGBA = tuple[int, int, int, int]
 type PathOrBytes = str | BinaryIO
+type ImageSource = PathOrBytes | bytes | memoryview
 
 
 class Orientation(Enum):
@@ -37,223 +43,350 @@ class FilterType(Enum):
     DEFAULT = SILHOUETTE
 
 
-def _offset(alignment: Alignment, container: int, item: int) -> int:
-    if alignment in (Alignment.BOTTOM, Alignment.RIGHT):
-        return container - item
-    if alignment is Alignment.CENTER:
-        return (container - item) // 2
-    return 0
-
-
-def get_dominant_color(image: PathOrBytes, normalize: bool = False) -> RGB:
-    if normalize:
-        image = normalize_image(image)
-
-    base = Image.open(image)
-    if base.mode != "RGBA":
-        base = base.convert("RGBA")
+def _dominant_colors(images: Sequence[Image.Image], scales: Sequence[int]) -> list[RGB]:
+    """Dominant colors of RGBA ``images`` as if each was upscaled by its integer scale."""
+    import numpy as np
 
-    w, h = base.size
-    colors = base.getcolors(w * h)
-    dominant = colors[0]
+    packed = [np.ascontiguousarray(np.asarray(image)).view("<u4").ravel() for image in images]
+    sizes = np.array([pixels.size for pixels in packed], dtype=np.intp)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    keys = np.concatenate(packed).astype(np.uint64)
+    keys |= np.repeat(np.arange(len(images), dtype=np.uint64) << np.uint64(32), sizes)
 
-    for count, color in colors:
-        cmax, cmin = max(color[:3]), min(color[:3])
-        lightness = (cmax + cmin) / 2
-        if lightness > 51 and count > dominant[0]:
-            # Discard transparent & dark pixels (lightness < 20%)
-            dominant = (count, color)
+    new_runs = np.empty(keys.size, dtype=bool)
+    new_runs[:1] = True
+    np.not_equal(keys[1:], keys[:-1], out=new_runs[1:])
+    run_starts = np.flatnonzero(new_runs)
+    run_lengths = np.diff(np.append(run_starts, keys.size))
+    keys, first, inverse = np.unique(keys[run_starts], return_index=True, return_inverse=True)
+    counts = np.bincount(inverse.ravel(), weights=run_lengths).astype(np.int64)
+    first = run_starts[first]
 
-    r, g, b, _ = dominant[1]
+    owners = (keys >> np.uint64(32)).astype(np.intp)
+    bounds = np.searchsorted(owners, np.arange(len(images) + 1))
+    colors = (keys & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+    first -= starts[owners]
 
-    return r, g, b
+    r, g, b = colors & 0xFF, (colors >> 8) & 0xFF, (colors >> 16) & 0xFF
+    cmax, cmin = np.maximum(np.maximum(r, g), b), np.minimum(np.minimum(r, g), b)
+    # Discard transparent & dark pixels (lightness < 20%)
+    candidates = (cmax.astype(np.int32) + cmin) > 102
 
+    dominant_colors = []
+    for image, scale, start, end in zip(images, scales, bounds[:-1], bounds[1:]):
+        window = slice(start, end)
+        dominant = _pick_dominant(image, scale, colors[window], first[window], counts[window], candidates[window])
+        dominant_colors.append((int(r[start + dominant]), int(g[start + dominant]), int(b[start + dominant])))
+    return dominant_colors
 
-def zoom_image(image: PathOrBytes, factor: int = 2) -> BytesIO:
-    base = Image.open(image)
-    zoomed = base.resize(tuple(int(factor * x) for x in base.size), resample=Image.Resampling.NEAREST)
 
-    buffer = BytesIO()
-    zoomed.save(buffer, "PNG")
-    buffer.seek(0)
+def _pick_dominant(image: Image.Image, scale: int, colors: np.ndarray, first: np.ndarray, counts: np.ndarray,
+                   candidates: np.ndarray) -> int:
+    """Index in ``colors`` of the dominant color, getcolors() order only decides ties."""
+    import numpy as np
 
-    return buffer
+    winners = np.flatnonzero(candidates & (counts == counts[candidates].max())) if candidates.any() else candidates[:0]
+    if winners.size == 1 and counts[winners[0]] > counts[~candidates].max(initial=0):
+        return int(winners[0])
 
+    listed = _getcolors_replay(image, scale, colors, first)
+    dominant = _color_index(colors, listed[0][1])
+    if winners.size == 0 or counts[winners[0]] <= counts[dominant]:
+        return dominant
+    if winners.size == 1:
+        return int(winners[0])
 
-def pad_image(image: PathOrBytes) -> BytesIO:
-    base = Image.open(image)
-    old_width, old_height = base.size
-    new_width, new_height = old_width + 100, old_height + 100
+    tied = set(map(tuple, colors[winners].astype("<u4").view(np.uint8).reshape(-1, 4).tolist()))
+    return next(_color_index(colors, color) for _, color in listed if color in tied)
 
-    padded = Image.new("RGBA", (new_width, new_height))
-    padded.paste(base, ((new_width - old_width) // 2, (new_height - old_height) // 2))
 
-    buffer = BytesIO()
-    padded.save(buffer, "PNG")
-    buffer.seek(0)
+def _getcolors_replay(image: Image.Image, scale: int, colors: np.ndarray,
+                      first: np.ndarray) -> list[tuple[int, RGBA]]:
+    """getcolors() order of ``image`` upscaled by ``scale``, replayed on one pixel per color."""
+    import numpy as np
 
-    return buffer
+    line = colors[np.argsort(first)].astype("<u4")
+    replay = Image.frombuffer("RGBA", (line.size, 1), line.tobytes(), "raw", "RGBA", 0, 1)
+    return replay.getcolors(image.width * image.height * scale * scale)
 
 
-def merge_images(
-        image1: PathOrBytes,
-        image2: PathOrBytes,
-        orientation: Orientation = Orientation.HORIZONTAL,
-        pixel_gap: int = 2,
-        crop_bbox: bool = True,
-        alignment: Alignment = Alignment.BOTTOM,
-) -> BytesIO:
-    image1 = normalize_image(image1, crop_bbox=crop_bbox)
-    image2 = normalize_image(image2, crop_bbox=crop_bbox)
+def _color_index(colors: np.ndarray, color: RGBA) -> int:
+    import numpy as np
 
-    image1 = Image.open(image1)
-    image2 = Image.open(image2)
+    r, g, b, a = color
+    return int(np.searchsorted(colors, r | g << 8 | b << 16 | a << 24))
 
-    if orientation is Orientation.HORIZONTAL:
-        size = (image1.width + image2.width + pixel_gap, max(image1.height, image2.height))
-        pos1 = (0, _offset(alignment, size[1], image1.height))
-        pos2 = (image1.width + pixel_gap, _offset(alignment, size[1], image2.height))
-    else:
-        size = (max(image1.width, image2.width), image1.height + image2.height + pixel_gap)
-        pos1 = (_offset(alignment, size[0], image1.width), 0)
-        pos2 = (_offset(alignment, size[0], image2.width), image1.height + pixel_gap)
 
-    merged = Image.new("RGBA", size)
-    merged.paste(image1, pos1)
-    merged.paste(image2, pos2)
+def get_dominant_colors(images: Iterable[ImageSource], normalize: bool = False,
+                        size: int | None = None) -> list[RGB]:
+    """Dominant colors of a batch of images, as if upscaled to ``size`` when given."""
+    rgba, scales = [], []
+    for image in images:
+        pipeline = ImagePipeline.open(image)
+        if normalize:
+            pipeline = pipeline.normalize()
+        pipeline = pipeline.to_rgba()
+        rgba.append(pipeline.image)
+        scales.append(pipeline.upscale_factor(size) if size is not None else 1)
+    return _dominant_colors(rgba, scales) if rgba else []
 
-    buffer = BytesIO()
-    merged.save(buffer, "PNG")
-    buffer.seek(0)
 
-    return buffer
+def _offset(alignment: Alignment, container: int, item: int) -> int:
+    if alignment in (Alignment.BOTTOM, Alignment.RIGHT):
+        return container - item
+    if alignment is Alignment.CENTER:
+        return (container - item) // 2
+    return 0
 
 
-def normalize_image(image: PathOrBytes, crop_bbox: bool = True) -> BytesIO:
-    base = Image.open(image)
-    if base.mode != "RGBA":
-        base = base.convert("RGBA")
-    premult = base.convert("RGBa")
-    if crop_bbox:
-        base = base.crop(premult.getbbox())
+class ImagePipeline:
+    """Chain of image operations on a decoded image, PNG-encoded once by to_buffer()."""
+
+    def __init__(self, image: Image.Image):
+        self.image = image
+
+    @classmethod
+    def open(cls, image: ImageSource) -> Self:
+        if isinstance(image, (bytes, memoryview)):
+            image = BytesIO(image)
+        return cls(Image.open(image))
+
+    def to_rgba(self) -> Self:
+        if self.image.mode != "RGBA":
+            return type(self)(self.image.convert("RGBA"))
+        return self
+
+    def normalize(self, crop_bbox: bool = True) -> Self:
+        base = self.to_rgba().image
+        if crop_bbox:
+            premult = base.convert("RGBa")
+            base = base.crop(premult.getbbox())
+        return type(self)(base)
+
+    def zoom(self, factor: int = 2) -> Self:
+        if factor == 1:
+            return self
+        size = tuple(int(factor * x) for x in self.image.size)
+        return type(self)(self.image.resize(size, resample=Image.Resampling.NEAREST))
+
+    def upscale_factor(self, size: int) -> int:
+        """Integer factor that brings pixel art stored below ``size`` (e.g. native 96x96 sprites) up to ``size``."""
+        return max(1, size // self.image.width)
+
+    def pad(self, padding: int = 100) -> Self:
+        old_width, old_height = self.image.size
+        new_width, new_height = old_width + padding, old_height + padding
+
+        padded = Image.new("RGBA", (new_width, new_height))
+        padded.paste(self.image, ((new_width - old_width) // 2, (new_height - old_height) // 2))
+        return type(self)(padded)
+
+    def merge(self, other: ImagePipeline, orientation: Orientation = Orientation.HORIZONTAL, pixel_gap: int = 2,
+              alignment: Alignment = Alignment.BOTTOM) -> Self:
+        image1, image2 = self.image, other.image
+
+        if orientation is Orientation.HORIZONTAL:
+            size = (image1.width + image2.width + pixel_gap, max(image1.height, image2.height))
+            pos1 = (0, _offset(alignment, size[1], image1.height))
+            pos2 = (image1.width + pixel_gap, _offset(alignment, size[1], image2.height))
+        else:
+            size = (max(image1.width, image2.width), image1.height + image2.height + pixel_gap)
+            pos1 = (_offset(alignment, size[0], image1.width), 0)
+            pos2 = (_offset(alignment, size[0], image2.width), image1.height + pixel_gap)
+
+        merged = Image.new("RGBA", size)
+        merged.paste(image1, pos1)
+        merged.paste(image2, pos2)
+        return type(self)(merged)
+
+    def filter(self, filter_type: FilterType = FilterType.DEFAULT) -> Self:
+        return type(self)(_FILTERS.get(filter_type, _filter_noop)(self.image))
+
+    def apply_filter(self, filter_type: FilterType = FilterType.DEFAULT, normalize: bool = True,
+                     scale: int = 1) -> Self:
+        pipeline = self
+        if normalize:
+            pipeline = pipeline.normalize(crop_bbox=filter_type is FilterType.SWIRL)
+        if scale != 1:
+            pipeline = pipeline.zoom(scale)
+        return pipeline.filter(filter_type)
+
+    def dominant_color(self, scale: int = 1) -> RGB:
+        """Same as ``zoom(scale).dominant_color()``, without upscaling."""
+        return _dominant_colors([self.to_rgba().image], [scale])[0]
+
+    def to_buffer(self) -> BytesIO:
+        buffer = BytesIO()
+        self.image.save(buffer, "PNG")
+        buffer.seek(0)
+
+        return buffer
+
+
+def get_dominant_color(image: ImageSource, normalize: bool = False) -> RGB:
+    pipeline = ImagePipeline.open(image)
+    if normalize:
+        pipeline = pipeline.normalize()
+    return pipeline.dominant_color()
 
-    buffer = BytesIO()
-    base.save(buffer, "PNG")
-    buffer.seek(0)
 
-    return buffer
+def zoom_image(image: ImageSource, factor: int = 2) -> BytesIO:
+    return ImagePipeline.open(image).zoom(factor).to_buffer()
 
 
-def apply_filter(image: PathOrBytes, normalize: bool = True, filter_type: FilterType = FilterType.DEFAULT,
-                 scale: int = 1) -> BytesIO:
-    if normalize:
-        image = normalize_image(image, crop_bbox=True if filter_type is FilterType.SWIRL else False)
-
-    base = Image.open(image)
-    if scale != 1:
-        base = base.resize(tuple(int(scale * x) for x in base.size), resample=Image.Resampling.NEAREST)
-
-    if filter_type is FilterType.SILHOUETTE:
-        return _filter_silhouette(base)
-    elif filter_type is FilterType.GAUSSIAN_BLUR:
-        return _filter_gaussian_blur(base)
-    elif filter_type is FilterType.PIXELATE:
-        return _filter_pixelate(base)
-    elif filter_type is FilterType.GRAYSCALE:
-        return _filter_grayscale(base)
-    elif filter_type is FilterType.EDGE:
-        return _filter_edge(base)
-    elif filter_type is FilterType.BOX:
-        return _filter_box(base)
-    elif filter_type is FilterType.SWIRL:
-        return _filter_swirl(base)
-    else:
-        return _filter_noop(base)
-
-
-def _filter_noop(image: Image.Image) -> BytesIO:
-    buffer = BytesIO()
-    image.save(buffer, "PNG")
-    buffer.seek(0)
-
-    return buffer
-
-
-def _filter_silhouette(image: Image.Image) -> BytesIO:
-    w, h = image.size
-    mask = Image.new("1", (w, h), 0)
-    silhouette = Image.composite(mask, image, image)
+def pad_image(image: ImageSource) -> BytesIO:
+    return ImagePipeline.open(image).pad().to_buffer()
 
-    buffer = BytesIO()
-    silhouette.save(buffer, "PNG")
-    buffer.seek(0)
 
-    return buffer
+def merge_images(
+        image1: ImageSource,
+        image2: ImageSource,
+        orientation: Orientation = Orientation.HORIZONTAL,
+        pixel_gap: int = 2,
+        crop_bbox: bool = True,
+        alignment: Alignment = Alignment.BOTTOM,
+) -> BytesIO:
+    pipeline1 = ImagePipeline.open(image1).normalize(crop_bbox=crop_bbox)
+    pipeline2 = ImagePipeline.open(image2).normalize(crop_bbox=crop_bbox)
+    return pipeline1.merge(pipeline2, orientation=orientation, pixel_gap=pixel_gap, alignment=alignment).to_buffer()
 
 
-def _filter_gaussian_blur(image: Image.Image) -> BytesIO:
-    blurred = image.filter(ImageFilter.GaussianBlur(radius=6))
+def normalize_image(image: ImageSource, crop_bbox: bool = True) -> BytesIO:
+    return ImagePipeline.open(image).normalize(crop_bbox=crop_bbox).to_buffer()
 
-    buffer = BytesIO()
-    blurred.save(buffer, "PNG")
-    buffer.seek(0)
 
-    return buffer
+def apply_filter(image: ImageSource, normalize: bool = True, filter_type: FilterType = FilterType.DEFAULT,
+                 scale: int = 1) -> BytesIO:
+    return ImagePipeline.open(image).apply_filter(filter_type, normalize=normalize, scale=scale).to_buffer()
 
 
-def _filter_pixelate(image: Image.Image, factor: int = 14) -> BytesIO:
-    downscaled = image.resize(tuple(int(x / factor) for x in image.size), resample=Image.Resampling.NEAREST)
-    upscaled = downscaled.resize(tuple(int(x * factor) for x in downscaled.size), resample=Image.Resampling.NEAREST)
+def _filter_noop(image: Image.Image) -> Image.Image:
+    return image
 
-    buffer = BytesIO()
-    upscaled.save(buffer, "PNG")
-    buffer.seek(0)
 
-    return buffer
+def _filter_silhouette(image: Image.Image) -> Image.Image:
+    w, h = image.size
+    mask = Image.new("1", (w, h), 0)
+    return Image.composite(mask, image, image)
 
 
-def _filter_grayscale(image: Image.Image) -> BytesIO:
-    grayscaled = image.convert("L")
+def _filter_gaussian_blur(image: Image.Image) -> Image.Image:
+    return image.filter(ImageFilter.GaussianBlur(radius=6))
 
-    buffer = BytesIO()
-    grayscaled.save(buffer, "PNG")
-    buffer.seek(0)
 
-    return buffer
+def _filter_pixelate(image: Image.Image, factor: int = 14) -> Image.Image:
+    downscaled = image.resize(tuple(int(x / factor) for x in image.size), resample=Image.Resampling.NEAREST)
+    return downscaled.resize(tuple(int(x * factor) for x in downscaled.size), resample=Image.Resampling.NEAREST)
 
 
-def _filter_edge(image: Image.Image) -> BytesIO:
-    edge = image.filter(ImageFilter.FIND_EDGES)
+def _filter_grayscale(image: Image.Image) -> Image.Image:
+    return image.convert("L")
 
-    buffer = BytesIO()
-    edge.save(buffer, "PNG")
-    buffer.seek(0)
 
-    return buffer
+def _filter_edge(image: Image.Image) -> Image.Image:
+    return image.filter(ImageFilter.FIND_EDGES)
 
 
-def _filter_box(image: Image.Image) -> BytesIO:
+def _filter_box(image: Image.Image) -> Image.Image:
     downscaled = image.resize(tuple(int(x / 14) for x in image.size), resample=Image.Resampling.NEAREST)
     upscaled = downscaled.resize(tuple(int(x * 14) for x in downscaled.size), resample=Image.Resampling.NEAREST)
-    box = upscaled.convert("L").filter(ImageFilter.FIND_EDGES)
-
-    buffer = BytesIO()
-    box.save(buffer, "PNG")
-    buffer.seek(0)
+    return upscaled.convert("L").filter(ImageFilter.FIND_EDGES)
 
-    return buffer
 
+def _filter_swirl(image: Image.Image) -> Image.Image:
+    import numpy as np
 
-def _filter_swirl(image: Image.Image) -> BytesIO:
-    radius = min(image.size)
     a = to_numpy(image)
-    swirled = swirl(a, rotation=0, strength=30, radius=radius)
-
-    buffer = BytesIO()
-    Image.fromarray((swirled * 255).astype(np.uint8)).save(buffer, "PNG")
-    buffer.seek(0)
-
-    return buffer
+    height, width = a.shape[:2]
+    index, top_weights, left_weights = _swirl_map(height, width)
+    bottom_weights, right_weights = 1.0 - top_weights, 1.0 - left_weights
+
+    # Bit-identical to skimage.transform.swirl(a, rotation=0, strength=30, radius=min(size)), which samples with
+    # scipy.ndimage.map_coordinates(order=1, mode="mirror"). The weights are applied in the same order as scipy.
+    uint8_to_float = _uint8_to_float()
+    samples = uint8_to_float.take(a.reshape(height * width, -1).take(index, axis=0))
+    for neighbour, row, col in zip(samples, (top_weights, top_weights, bottom_weights, bottom_weights),
+                                   (left_weights, right_weights, left_weights, right_weights)):
+        neighbour *= row
+        neighbour *= col
+    swirled = samples[0] + samples[1]
+    swirled += samples[2]
+    swirled += samples[3]
+    swirled = np.clip(swirled, uint8_to_float[a.min()], uint8_to_float[a.max()])
+    return Image.fromarray((swirled.reshape(a.shape) * 255).astype(np.uint8))
+
+
+@lru_cache(maxsize=1)
+def _uint8_to_float() -> np.ndarray:
+    import numpy as np
+
+    return np.multiply(np.arange(256, dtype=np.uint8), 1 / 255, dtype=np.float64)
+
+
+# Cropped sprites come in many sizes, so only the last few maps are kept (~2.6 MB each at 288x288)
+@lru_cache(maxsize=8)
+def _swirl_map(height: int, width: int, strength: float = 30) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Source pixels of the 4 neighbours of every output pixel, and the weights of the top and left ones."""
+    import numpy as np
+
+    y, x = np.indices((height, width), dtype=np.float64)
+    x0, y0 = width / 2, height / 2
+    rho = np.sqrt((x - x0) ** 2 + (y - y0) ** 2)
+    # Decays to ~1/1000th of the strength at the radius
+    radius = min(width, height) / 5 * np.log(2)
+    theta = strength * np.exp(-rho / radius) + np.arctan2(y - y0, x - x0)
+
+    left, right, left_weights = _linear_neighbours((x0 + rho * np.cos(theta)).ravel(), width)
+    top, bottom, top_weights = _linear_neighbours((y0 + rho * np.sin(theta)).ravel(), height)
+    top, bottom = top * width, bottom * width
+
+    index = np.stack((top + left, top + right, bottom + left, bottom + right)).astype(np.int32)
+    return index, top_weights[:, np.newaxis], left_weights[:, np.newaxis]
+
+
+def _linear_neighbours(coords: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    import numpy as np
+
+    coords = _mirror_coords(coords, size)
+    floor = np.floor(coords)
+    low_weights = 1.0 - (coords - floor)
+    floor = floor.astype(np.intp)
+    return _mirror_index(floor, size), _mirror_index(floor + 1, size), low_weights
+
+
+def _mirror_coords(coords: np.ndarray, size: int) -> np.ndarray:
+    """Reflects out of bounds coordinates about the edge pixels (scipy.ndimage's "mirror" mode)."""
+    import numpy as np
+
+    if size <= 1:
+        return np.zeros_like(coords)
+    period = 2 * size - 2
+    below = period * np.trunc(-coords / period) + coords
+    below = np.where(below <= 1 - size, below + period, -below)
+    above = coords - period * np.trunc(coords / period)
+    above = np.where(above >= size, period - above, above)
+    return np.where(coords < 0, below, np.where(coords > size - 1, above, coords))
+
+
+def _mirror_index(index: np.ndarray, size: int) -> np.ndarray:
+    import numpy as np
+
+    if size <= 1:
+        return np.zeros_like(index)
+    period = 2 * size - 2
+    index = np.abs(index) % period
+    return np.where(index >= size, period - index, index)
+
+
+_FILTERS: dict[FilterType, Callable[[Image.Image], Image.Image]] = {
+    FilterType.SILHOUETTE: _filter_silhouette,
+    FilterType.GAUSSIAN_BLUR: _filter_gaussian_blur,
+    FilterType.PIXELATE: _filter_pixelate,
+    FilterType.GRAYSCALE: _filter_grayscale,
+    FilterType.EDGE: _filter_edge,
+    FilterType.BOX: _filter_box,
+    FilterType.SWIRL: _filter_swirl,
+}
 
 
 def save_to_file(path: str, image: BinaryIO) -> None:
@@ -263,6 +396,8 @@ def save_to_file(path: str, image: BinaryIO) -> None:
 
 def to_numpy(im: Image.Image):
     """https://uploadcare.com/blog/fast-import-of-pillow-images-to-numpy-opencv-arrays/"""
+    import numpy as np
+
     im.load()
     # unpack data
     e = Image._getencoder(im.mode, 'raw', im.mode)
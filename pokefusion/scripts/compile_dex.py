@@ -0,0 +1,22 @@
+import logging
+import os
+import time
+
+from pokefusion.configmanager import ConfigManager
+from pokefusion.fusionapi import FusionClient, FusionTables
+
+logger = logging.getLogger(__name__)
+
+
+def compile_dex() -> None:
+    start_time = time.perf_counter()
+    ConfigManager.clear_cache()
+
+    tables, bitmaps = FusionTables.compile(FusionClient.MAX_ID)
+    ConfigManager.write_artifact(tables, bitmaps)
+    ConfigManager.clear_cache()
+
+    size = os.path.getsize(ConfigManager.ARTIFACT_PATH)
+    elapsed_time = time.perf_counter() - start_time
+    logger.info(
+        f"Compiled {len(ConfigManager.ARTIFACT_DEX_SOURCES)} dex files and {len(tables)} fusion tables to '{ConfigManager.ARTIFACT_PATH}' ({size / 1024:.0f} KB) in {elapsed_time:.2f} seconds")
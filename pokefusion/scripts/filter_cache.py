@@ -0,0 +1,64 @@
+import logging
+import os
+import time
+from multiprocessing import Pool, cpu_count
+
+from tqdm import tqdm
+
+from pokefusion.assetmanager import AssetManager
+from pokefusion.configmanager import FilterCacheConfig
+from pokefusion.fusionapi import SpriteClient
+from pokefusion.services.filter_cache import FilterCache
+from pokefusion.services.guess import GUESS_GAMES
+from pokefusion.services.render import GuessSpriteJob, execute, init_worker
+
+logger = logging.getLogger(__name__)
+
+
+def generate_filter_cache(config: FilterCacheConfig, scale: int = 3, prune: bool = True) -> None:
+    if config.path is None:
+        logger.error("Filter cache is disabled in the config")
+        return
+
+    start_time = time.perf_counter()
+    cache = FilterCache(config.path, config.max_size)
+    cache.scan()
+    chains = {game.filters for game in GUESS_GAMES.values() if not game.fusion}
+
+    keys = set()
+    jobs = {}
+    missing = 0
+    for dex_id in range(SpriteClient.MIN_ID, SpriteClient.MAX_ID + 1):
+        path = os.path.join(AssetManager.SPRITES_BASE_DIR, f"{dex_id}.png")
+        if not os.path.isfile(path):
+            missing += 1
+            continue
+
+        for filters in chains:
+            key = cache.key(path, filters, scale)
+            keys.add(key)
+            if key not in cache:
+                jobs[key] = GuessSpriteJob(path, filters, scale)
+
+    if missing:
+        logger.warning(f"Skipped {missing} missing sprites in '{AssetManager.SPRITES_BASE_DIR}'")
+
+    if prune:
+        pruned = cache.prune(keys)
+        logger.info(f"Pruned {pruned} stale filter cache entries")
+
+    logger.info(f"{len(keys) - len(jobs)}/{len(keys)} filtered sprites already cached")
+
+    cores = cpu_count()
+    desc = f"Generating filtered sprites (on {cores} cores)"
+    with Pool(cores, initializer=init_worker, initargs=(len(chains),)) as pool:
+        images = pool.imap(execute, jobs.values(), chunksize=len(chains))
+        for key, image in tqdm(zip(jobs, images), total=len(jobs), desc=desc):
+            cache.put(key, image)
+
+    if cache.size > cache.max_size * 0.9:
+        logger.warning(f"Filter cache is at {cache.size / 1024 ** 2:.1f}/{cache.max_size / 1024 ** 2:.1f} MB, "
+                       f"consider raising filter_cache.max_size_mb")
+
+    elapsed_time = time.perf_counter() - start_time
+    logger.info(f"Generated {len(jobs)} filtered sprites in {elapsed_time:.2f} seconds")
@@ -0,0 +1,65 @@
+import logging
+import os
+import time
+from collections.abc import Iterable
+from functools import partial
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+from tqdm import tqdm
+
+from pokefusion.atlas import read_atlas
+from pokefusion.fusionapi import FusionClient, FusionColorTable, scan_atlases
+from pokefusion.imagelib import get_dominant_colors
+
+logger = logging.getLogger(__name__)
+
+NO_COLOR = (0, 0, 0, 0)  # Colors of fusions with a sprite have an alpha of 255
+
+
+def compute_fusion_colors(autogen_dir: str, custom_dir: str, output_path: str,
+                          heads: Iterable[int] | None = None) -> None:
+    start_time = time.perf_counter()
+
+    size = FusionClient.MAX_ID
+    _, digests = scan_atlases((autogen_dir, custom_dir), size)
+    existing = FusionColorTable.read(output_path, size)
+    if existing is not None:
+        # Only recompute the given heads and the ones whose atlases changed since
+        table = np.frombuffer(existing.data, dtype=np.uint8).reshape(size, size, 4).copy()
+        stale = {head for head, (old, new) in enumerate(zip(existing.digests, digests), 1) if old != new}
+        heads = sorted(stale.union(heads or ()))
+    else:
+        table = np.zeros((size, size, 4), dtype=np.uint8)
+        heads = range(1, size + 1)
+
+    cores = cpu_count()
+    desc = f"Computing fusion colors (on {cores} cores)"
+    with Pool(cores) as pool:
+        func = partial(_head_colors, autogen_dir=autogen_dir, custom_dir=custom_dir)
+        for head, colors in tqdm(zip(heads, pool.imap(func, heads)), total=len(heads), desc=desc):
+            table[head - 1] = colors
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    FusionColorTable(digests, table.tobytes(), size).write(output_path)
+
+    elapsed_time = time.perf_counter() - start_time
+    logger.info(f"Computed {len(heads) * size} fusion colors in {elapsed_time:.2f} seconds")
+
+
+def _head_colors(head: int, autogen_dir: str, custom_dir: str) -> list[tuple[int, int, int, int]]:
+    autogen = read_atlas(autogen_dir, head)
+    custom = read_atlas(custom_dir, head)
+
+    bodies = range(1, FusionClient.MAX_ID + 1)
+    sprites = {}
+    for body in bodies:
+        for atlas in (custom, autogen):
+            sprite = atlas.get(body) if atlas is not None else None
+            if sprite is not None:
+                sprites[body] = sprite
+                break
+
+    # getcolors() tie-breaking depends on the image size, so colors are counted as if at display size like renders
+    colors = dict(zip(sprites, get_dominant_colors(sprites.values(), size=FusionClient.SPRITE_SIZE)))
+    return [(*colors[body], 255) if body in colors else NO_COLOR for body in bodies]
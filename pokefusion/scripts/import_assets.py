@@ -1,4 +1,5 @@
 import contextlib
+import hashlib
 import json
 import logging
 import os
@@ -7,13 +8,19 @@ import shutil
 import tempfile
 import time
 import zipfile
+import zlib
 from collections import defaultdict
+from collections.abc import Callable, Iterable, Mapping
+from functools import partial
+from multiprocessing import Pool, cpu_count
 from pathlib import Path
+from typing import NamedTuple
 
 from tqdm import tqdm
 
-from pokefusion.fusionapi import FusionClient
-from . import spritesheets
+from pokefusion.assetmanager import AssetManager
+from pokefusion.atlas import ATLAS_EXTENSION, SpriteAtlas, atlas_path, read_atlas
+from pokefusion.fusionapi import FUSION_TABLES, FusionClient
 from .git import run_git
 from .utils import make_backup, regex_filter
 
@@ -22,7 +29,19 @@ logger = logging.getLogger(__name__)
 ZIP_FUSION_PATTERN = re.compile(r"CustomBattlers/\d+\.\d+\.png")
 ZIP_EGG_PATTERN = re.compile(r"Other/Eggs/(?!000)\d+.png")
 SPRITE_PATTERN = re.compile(r"\d+\.\d+\.png")
+ATLAS_PATTERN = re.compile(r"\d+\.atlas$")
 EGG_PATTERN = re.compile(r"\d+\.png")
+MANIFEST_FILE = "manifest.json"
+EGGS_PER_TASK = 32
+
+type FusionKey = tuple[int, int]
+
+
+class FusionsDiff(NamedTuple):
+    added: set[FusionKey]
+    removed: set[FusionKey]
+    modified: set[FusionKey]
+
 
 INPUT_DIR = os.path.join("pokefusion", "scripts", "input")
 OUTPUT_DIR = os.path.join("pokefusion", "scripts", "output")
@@ -51,6 +70,8 @@ def is_valid_pack(pack_path: str) -> bool:
 
 
 def import_autogen_sprites() -> None:
+    from . import spritesheets
+
     start_time = time.perf_counter()
 
     output_dir = os.path.join(OUTPUT_DIR, "fusions", "autogen")
@@ -94,17 +115,17 @@ def import_autogen_sprites() -> None:
 
     start_time = time.perf_counter()
 
-    spritesheets.process_dir(input_dir, output_dir)
+    stats = spritesheets.process_dir(input_dir, output_dir)
     tempdir.cleanup()
 
-    sprite_count = sum(len(filenames) for _, _, filenames in os.walk(output_dir))
-
     elapsed_time = time.perf_counter() - start_time
     logger.info(
-        f"Processed {sprite_count} autogen sprites (from {sheet_count} spritesheets) in {elapsed_time:.2f} seconds")
+        f"Processed {stats.sprites} autogen sprites (from {stats.sheets} spritesheets, skipped {stats.skipped} empty cells) in {elapsed_time:.2f} seconds")
+    logger.info(
+        f"Split throughput: {(stats.sprites + stats.skipped) / elapsed_time:.0f} sprites/s, read {stats.read_size / 1024 ** 2 / elapsed_time:.1f} MB/s, wrote {stats.written_size / 1024 ** 2 / elapsed_time:.1f} MB/s")
 
 
-def import_custom_sprites(pack_name: str) -> None:
+def import_custom_sprites(pack_name: str, workers: int | None = None) -> None:
     start_time = time.perf_counter()
 
     pack_path = get_pack_path(pack_name)
@@ -113,37 +134,191 @@ def import_custom_sprites(pack_name: str) -> None:
         return
 
     output_dir = os.path.join(OUTPUT_DIR, "fusions", "custom")
-
-    sprite_count = 0
-    file_count = 0
-    existing_folders = set()
+    os.makedirs(output_dir, exist_ok=True)
 
     with zipfile.ZipFile(pack_path, "r") as zipf:
-        desc = "Importing sprites from ZIP file"
+        entries, file_count = get_pack_fusions(zipf)
 
-        for filename in regex_filter(tqdm(zipf.namelist(), desc=desc), ZIP_FUSION_PATTERN):
-            file_count += 1
-            head, body = map(int, os.path.splitext(os.path.basename(filename))[0].split(".", 1))
+    heads = defaultdict(list)
+    for (head, body), info in entries.items():
+        heads[head].append((body, info.filename))
 
-            if head > FusionClient.MAX_ID or body > FusionClient.MAX_ID:
-                continue
+    # One atlas per task, written by the worker straight from the ZIP file
+    func = partial(_extract_head, output_dir=output_dir)
+    extract_pack(pack_path, func, sorted(heads.items()), len(entries), "Importing sprites from ZIP file", workers)
+
+    write_manifest(output_dir, {key: (info.CRC, info.file_size) for key, info in entries.items()})
 
-            sprite_count += 1
-            sprite_output_dir = os.path.join(output_dir, str(head))
+    elapsed_time = time.perf_counter() - start_time
+    logger.info(
+        f"Processed {len(entries)} custom sprites (discarded {file_count - len(entries)} sprites > MAX_ID) in {elapsed_time:.2f} seconds")
 
-            if head not in existing_folders:
-                os.makedirs(sprite_output_dir, exist_ok=True)
-                existing_folders.add(head)
 
-            with open(os.path.join(sprite_output_dir, f"{head}.{body}.png"), "wb") as sprite_file:
-                sprite_file.write(zipf.read(filename))
+def update_custom_sprites(pack_name: str) -> set[int] | None:
+    """
+    Applies a pack to the custom sprites in the assets folder, only rewriting the atlases of heads with added, changed
+    or removed sprites. Entries are compared by the CRC32 and size from the ZIP central directory, against the manifest
+    of the current assets. Returns the heads that changed.
+    """
+    start_time = time.perf_counter()
+
+    pack_path = get_pack_path(pack_name)
+    if not is_valid_pack(pack_path):
+        logger.error(f"Invalid Pack: '{pack_path}'")
+        return None
+
+    folder = AssetManager.FUSIONS_CUSTOM_DIR
+    if folder in AssetManager.get_unpacked_fusion_folders():
+        # Only the changed heads are rewritten, the others would be left in the old layout
+        logger.error(f"Custom sprites in '{folder}' aren't packed into atlases, run 'tools pack_atlases' first")
+        return None
+
+    os.makedirs(folder, exist_ok=True)
+    old = read_manifest(folder)
+
+    with zipfile.ZipFile(pack_path, "r") as zipf:
+        entries, file_count = get_pack_fusions(zipf)
+        new = {key: (info.CRC, info.file_size) for key, info in entries.items()}
+
+        diff = get_fusions_diff(old, new)
+
+        changes = defaultdict(list)
+        for key in diff.added | diff.removed | diff.modified:
+            changes[key[0]].append(key)
+
+        desc = "Updating custom sprite atlases"
+        for head, keys in tqdm(sorted(changes.items()), desc=desc):
+            atlas = read_atlas(folder, head)
+            sprites = {body: bytes(atlas.get(body)) for body in atlas.bodies()} if atlas is not None else {}
+            del atlas  # Unmapped before the file is replaced
+
+            for key in keys:
+                if key in diff.removed:
+                    sprites.pop(key[1], None)
+                else:
+                    sprites[key[1]] = zipf.read(entries[key])
+
+            if sprites:
+                SpriteAtlas.write(atlas_path(folder, head), sprites)
+            else:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(atlas_path(folder, head))
+
+    write_manifest(folder, new)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    with open(os.path.join(OUTPUT_DIR, "custom_fusions.json"), "w", encoding="utf-8") as f:
+        json.dump(_group_fusions(new), f)
+    with open(os.path.join(OUTPUT_DIR, "custom_diff_added.json"), "w", encoding="utf-8") as f:
+        json.dump(_group_fusions(diff.added), f)
+    with open(os.path.join(OUTPUT_DIR, "custom_diff_removed.json"), "w", encoding="utf-8") as f:
+        json.dump(_group_fusions(diff.removed), f)
+    with open(os.path.join(OUTPUT_DIR, "custom_diff_modified.json"), "w", encoding="utf-8") as f:
+        json.dump(_group_fusions(diff.modified), f)
 
     elapsed_time = time.perf_counter() - start_time
     logger.info(
-        f"Processed {sprite_count} custom sprites (discarded {file_count - sprite_count} sprites > MAX_ID) in {elapsed_time:.2f} seconds")
+        f"Updated custom sprites (+{len(diff.added)}/-{len(diff.removed)}/~{len(diff.modified)} in {len(changes)} heads, discarded {file_count - len(entries)} sprites > MAX_ID) in {elapsed_time:.2f} seconds")
+    return set(changes)
+
+
+def extract_pack[T](pack_path: str, func: Callable[[T], int], tasks: list[T], total: int, desc: str,
+                    workers: int | None = None) -> None:
+    """
+    Runs extraction tasks in a pool where every worker has its own handle on the pack. ``func`` returns how many files
+    a task extracted, which drives a single progress bar. With one worker, tasks run in this process instead.
+    """
+    workers = workers or cpu_count()
+    with tqdm(total=total, desc=f"{desc} (on {workers} cores)") as progress:
+        if workers == 1:
+            _open_pack(pack_path)
+            try:
+                for count in map(func, tasks):
+                    progress.update(count)
+            finally:
+                _close_pack()
+            return
+
+        with Pool(workers, initializer=_open_pack, initargs=(pack_path,)) as pool:
+            for count in pool.imap_unordered(func, tasks):
+                progress.update(count)
+
+
+_pack: zipfile.ZipFile | None = None
+
+
+def _open_pack(pack_path: str) -> None:
+    global _pack
+    _pack = zipfile.ZipFile(pack_path, "r")
+
+
+def _close_pack() -> None:
+    global _pack
+    _pack.close()
+    _pack = None
+
+
+def _extract_head(task: tuple[int, list[tuple[int, str]]], output_dir: str) -> int:
+    head, entries = task
+    filenames = dict(entries)
+    sizes = {body: _pack.getinfo(filename).file_size for body, filename in entries}
+    SpriteAtlas.write_from(atlas_path(output_dir, head), sizes, lambda body: _pack.open(filenames[body]))
+    return len(entries)
+
+
+def _extract_eggs(entries: list[tuple[int, str]], output_dir: str) -> int:
+    for dex_id, filename in entries:
+        with _pack.open(filename) as src, open(os.path.join(output_dir, f"{dex_id}.png"), "wb") as dst:
+            shutil.copyfileobj(src, dst)
+    return len(entries)
+
+
+def get_pack_fusions(zipf: zipfile.ZipFile) -> tuple[dict[tuple[int, int], zipfile.ZipInfo], int]:
+    entries = {}
+    file_count = 0
+
+    for info in zipf.infolist():
+        if not ZIP_FUSION_PATTERN.match(info.filename):
+            continue
+
+        file_count += 1
+        head, body = map(int, os.path.splitext(os.path.basename(info.filename))[0].split(".", 1))
+        if head <= FusionClient.MAX_ID and body <= FusionClient.MAX_ID:
+            entries[head, body] = info
+
+    return entries, file_count
+
+
+def read_manifest(folder: str) -> dict[tuple[int, int], tuple[int, int]]:
+    path = os.path.join(folder, MANIFEST_FILE)
+    if os.path.isfile(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return {tuple(map(int, key.split("."))): tuple(value) for key, value in json.load(f).items()}
+
+    # Atlases hold the PNGs exactly as they were in the pack, so their CRC32 matches the ZIP entries
+    logger.info(f"No manifest in '{folder}', computing it from the atlases")
+    manifest = {}
+    for head, bodies in get_fusions(folder).items():
+        atlas = read_atlas(folder, head)
+        for body in bodies:
+            sprite = atlas.get(body)
+            manifest[head, body] = (zlib.crc32(sprite), len(sprite))
+    return manifest
+
+
+def write_manifest(folder: str, manifest: dict[tuple[int, int], tuple[int, int]]) -> None:
+    with open(os.path.join(folder, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump({f"{head}.{body}": list(value) for (head, body), value in sorted(manifest.items())}, f)
+
+
+def _group_fusions(keys: Iterable[tuple[int, int]]) -> dict[int, list[int]]:
+    fusions = defaultdict(list)
+    for head, body in sorted(keys):
+        fusions[head].append(body)
+    return dict(fusions)
 
 
-def import_egg_sprites(pack_name: str) -> None:
+def import_egg_sprites(pack_name: str, workers: int | None = None) -> None:
     start_time = time.perf_counter()
 
     pack_path = get_pack_path(pack_name)
@@ -154,28 +329,44 @@ def import_egg_sprites(pack_name: str) -> None:
     output_dir = os.path.join(OUTPUT_DIR, "eggs")
     os.makedirs(output_dir, exist_ok=True)
 
-    egg_count = 0
+    eggs = []
     file_count = 0
 
     with zipfile.ZipFile(pack_path, "r") as zipf:
-        desc = "Importing egg sprites from ZIP file"
-
-        for filename in regex_filter(tqdm(zipf.namelist(), desc=desc), ZIP_EGG_PATTERN):
+        for filename in regex_filter(zipf.namelist(), ZIP_EGG_PATTERN):
             file_count += 1
             dex_id = int(os.path.splitext(os.path.basename(filename))[0])
 
             if dex_id < 1 or dex_id > FusionClient.MAX_ID:
                 continue
 
-            egg_count += 1
-            with open(os.path.join(output_dir, f"{dex_id}.png"), "wb") as egg_file:
-                egg_file.write(zipf.read(filename))
+            eggs.append((dex_id, filename))
+
+    chunks = [eggs[i:i + EGGS_PER_TASK] for i in range(0, len(eggs), EGGS_PER_TASK)]
+    func = partial(_extract_eggs, output_dir=output_dir)
+    extract_pack(pack_path, func, chunks, len(eggs), "Importing egg sprites from ZIP file", workers)
+    egg_count = len(eggs)
 
     elapsed_time = time.perf_counter() - start_time
     logger.info(
         f"Processed {egg_count} egg sprites (discarded {file_count - egg_count} egg sprites > MAX_ID) in {elapsed_time:.2f} seconds")
 
 
+def import_fusion_colors(from_output: bool = True, heads: Iterable[int] | None = None) -> None:
+    from .fusion_colors import compute_fusion_colors
+
+    if from_output:
+        autogen_dir = os.path.join(OUTPUT_DIR, "fusions", "autogen")
+        custom_dir = os.path.join(OUTPUT_DIR, "fusions", "custom")
+        output_path = os.path.join(OUTPUT_DIR, "fusion_colors.bin")
+    else:
+        autogen_dir = AssetManager.FUSIONS_AUTOGEN_DIR
+        custom_dir = AssetManager.FUSIONS_CUSTOM_DIR
+        output_path = AssetManager.FUSION_COLORS_PATH
+
+    compute_fusion_colors(autogen_dir, custom_dir, output_path, heads)
+
+
 def save_diff() -> None:
     start_time = time.perf_counter()
 
@@ -191,45 +382,30 @@ def save_diff() -> None:
     autogen_diff_removed_output = os.path.join(OUTPUT_DIR, "autogen_diff_removed.json")
     custom_diff_added_output = os.path.join(OUTPUT_DIR, "custom_diff_added.json")
     custom_diff_removed_output = os.path.join(OUTPUT_DIR, "custom_diff_removed.json")
+    custom_diff_modified_output = os.path.join(OUTPUT_DIR, "custom_diff_modified.json")
     eggs_diff_added_output = os.path.join(OUTPUT_DIR, "eggs_diff_added.json")
     eggs_diff_removed_output = os.path.join(OUTPUT_DIR, "eggs_diff_removed.json")
 
-    autogen_old = get_fusions(autogen_folder_old)
-    autogen_new = get_fusions(autogen_folder_new)
-    custom_old = get_fusions(custom_folder_old)
-    custom_new = get_fusions(custom_folder_new)
+    autogen_diff = get_fusions_diff(index_fusions(autogen_folder_old), index_fusions(autogen_folder_new))
+    custom_new = index_fusions(custom_folder_new, hashed=True)
+    custom_diff = get_fusions_diff(index_fusions(custom_folder_old, hashed=True), custom_new)
     eggs_old = get_eggs(eggs_folder_old)
     eggs_new = get_eggs(eggs_folder_new)
-    autogen_diff_added = get_fusions_diff(autogen_old, autogen_new)
-    autogen_diff_removed = get_fusions_diff(autogen_new, autogen_old)
-    custom_diff_added = get_fusions_diff(custom_old, custom_new)
-    custom_diff_removed = get_fusions_diff(custom_new, custom_old)
     eggs_diff_added = get_eggs_diff(eggs_old, eggs_new)
     eggs_diff_removed = get_eggs_diff(eggs_new, eggs_old)
 
-    autogen_diff_added_count = 0
-    autogen_diff_removed_count = 0
-    custom_diff_added_count = 0
-    custom_diff_removed_count = 0
-    for head in autogen_diff_added:
-        autogen_diff_added_count += len(autogen_diff_added[head])
-    for head in autogen_diff_removed:
-        autogen_diff_removed_count += len(autogen_diff_removed[head])
-    for head in custom_diff_added:
-        custom_diff_added_count += len(custom_diff_added[head])
-    for head in custom_diff_removed:
-        custom_diff_removed_count += len(custom_diff_removed[head])
-
     with open(custom_fusions_output, "w", encoding="utf-8") as f:
-        json.dump(custom_new, f)
+        json.dump(_group_fusions(custom_new), f)
     with open(autogen_diff_added_output, "w", encoding="utf-8") as f:
-        json.dump(autogen_diff_added, f)
+        json.dump(_group_fusions(autogen_diff.added), f)
     with open(autogen_diff_removed_output, "w", encoding="utf-8") as f:
-        json.dump(autogen_diff_removed, f)
+        json.dump(_group_fusions(autogen_diff.removed), f)
     with open(custom_diff_added_output, "w", encoding="utf-8") as f:
-        json.dump(custom_diff_added, f)
+        json.dump(_group_fusions(custom_diff.added), f)
     with open(custom_diff_removed_output, "w", encoding="utf-8") as f:
-        json.dump(custom_diff_removed, f)
+        json.dump(_group_fusions(custom_diff.removed), f)
+    with open(custom_diff_modified_output, "w", encoding="utf-8") as f:
+        json.dump(_group_fusions(custom_diff.modified), f)
     with open(eggs_diff_added_output, "w", encoding="utf-8") as f:
         json.dump(eggs_diff_added, f)
     with open(eggs_diff_removed_output, "w", encoding="utf-8") as f:
@@ -237,7 +413,7 @@ def save_diff() -> None:
 
     elapsed_time = time.perf_counter() - start_time
     logger.info(
-        f"Saved diffs for +{autogen_diff_added_count}/-{autogen_diff_removed_count} autogen fusions, +{custom_diff_added_count}/-{custom_diff_removed_count} custom fusions and +{len(eggs_diff_added)}/-{len(eggs_diff_removed)} eggs in {elapsed_time:.2f} seconds")
+        f"Saved diffs for +{len(autogen_diff.added)}/-{len(autogen_diff.removed)} autogen fusions, +{len(custom_diff.added)}/-{len(custom_diff.removed)}/~{len(custom_diff.modified)} custom fusions and +{len(eggs_diff_added)}/-{len(eggs_diff_removed)} eggs in {elapsed_time:.2f} seconds")
 
 
 def move_to_assets():
@@ -246,20 +422,15 @@ def move_to_assets():
     autogen_output = os.path.join(OUTPUT_DIR, "fusions", "autogen")
     custom_output = os.path.join(OUTPUT_DIR, "fusions", "custom")
     eggs_output = os.path.join(OUTPUT_DIR, "eggs")
-    custom_fusions_output = os.path.join(OUTPUT_DIR, "custom_fusions.json")
-    custom_diff_added_output = os.path.join(OUTPUT_DIR, "custom_diff_added.json")
+    colors_output = os.path.join(OUTPUT_DIR, "fusion_colors.bin")
 
     base_assets = os.path.join("pokefusion", "assets")
     base_assets_fusions = os.path.join(base_assets, "fusions")
 
-    base_config = os.path.join("pokefusion", "config")
-    custom_fusions_assets = os.path.join(base_config, "custom_fusions.json")
-    custom_diff_added_assets = os.path.join(base_config, "custom_diff_added.json")
-
     move_autogen = os.path.exists(autogen_output)
     move_custom = os.path.exists(custom_output)
     move_eggs = os.path.exists(eggs_output)
-    move_config = os.path.exists(custom_fusions_output) and os.path.exists(custom_diff_added_output)
+    move_colors = os.path.exists(colors_output)
 
     if move_autogen or move_custom:
         os.makedirs(base_assets_fusions, exist_ok=True)
@@ -273,43 +444,132 @@ def move_to_assets():
     if move_eggs:
         shutil.move(eggs_output, base_assets)
 
-    if move_config:
-        if os.path.exists(custom_fusions_assets):
-            make_backup(custom_fusions_assets)
+    if move_colors:
+        os.makedirs(base_assets_fusions, exist_ok=True)
+        shutil.move(colors_output, AssetManager.FUSION_COLORS_PATH)
 
-        if os.path.exists(custom_diff_added_assets):
-            make_backup(custom_diff_added_assets)
+    move_config = move_config_to_assets(reload=False)
 
-        shutil.move(custom_fusions_output, custom_fusions_assets)
-        shutil.move(custom_diff_added_output, custom_diff_added_assets)
+    if (move_config or move_colors) and FUSION_TABLES.loaded:
+        FUSION_TABLES.reload()
 
     elapsed_time = time.perf_counter() - start_time
     logger.info(f"Moved files to assets folder in {elapsed_time:.2f} seconds")
 
 
+def move_config_to_assets(reload: bool = True) -> bool:
+    custom_fusions_output = os.path.join(OUTPUT_DIR, "custom_fusions.json")
+    custom_diff_added_output = os.path.join(OUTPUT_DIR, "custom_diff_added.json")
+    custom_diff_modified_output = os.path.join(OUTPUT_DIR, "custom_diff_modified.json")
+
+    base_config = os.path.join("pokefusion", "config")
+    custom_fusions_assets = os.path.join(base_config, "custom_fusions.json")
+    custom_diff_added_assets = os.path.join(base_config, "custom_diff_added.json")
+    custom_diff_modified_assets = os.path.join(base_config, "custom_diff_modified.json")
+
+    if not (os.path.exists(custom_fusions_output) and os.path.exists(custom_diff_added_output)):
+        return False
+
+    if os.path.exists(custom_fusions_assets):
+        make_backup(custom_fusions_assets)
+
+    if os.path.exists(custom_diff_added_assets):
+        make_backup(custom_diff_added_assets)
+
+    shutil.move(custom_fusions_output, custom_fusions_assets)
+    shutil.move(custom_diff_added_output, custom_diff_added_assets)
+
+    if os.path.exists(custom_diff_modified_output):
+        if os.path.exists(custom_diff_modified_assets):
+            make_backup(custom_diff_modified_assets)
+        shutil.move(custom_diff_modified_output, custom_diff_modified_assets)
+
+    if reload and FUSION_TABLES.loaded:
+        FUSION_TABLES.reload()
+    return True
+
+
+def pack_fusion_folders(folder: str) -> None:
+    start_time = time.perf_counter()
+
+    heads = [
+        int(entry.name) for entry in os.scandir(folder)
+        if entry.is_dir() and entry.name.isdigit()
+    ] if os.path.isdir(folder) else []
+
+    cores = cpu_count()
+    desc = f"Packing fusion folders into atlases (on {cores} cores)"
+    with Pool(cores) as pool:
+        func = partial(_pack_fusion_folder, folder=folder)
+        sprite_count = sum(tqdm(pool.imap_unordered(func, heads), total=len(heads), desc=desc))
+
+    elapsed_time = time.perf_counter() - start_time
+    logger.info(
+        f"Packed {sprite_count} sprites from '{folder}' into {len(heads)} atlases in {elapsed_time:.2f} seconds")
+
+
+def _pack_fusion_folder(head: int, folder: str) -> int:
+    head_folder = os.path.join(folder, str(head))
+    sprites = {}
+
+    for filename in regex_filter(os.listdir(head_folder), SPRITE_PATTERN):
+        body = int(os.path.splitext(filename)[0].split(".", 1)[1])
+        with open(os.path.join(head_folder, filename), "rb") as f:
+            sprites[body] = f.read()
+
+    SpriteAtlas.write(atlas_path(folder, head), sprites)
+    shutil.rmtree(head_folder)
+    return len(sprites)
+
+
 def get_fusions(folder: str) -> dict[int, list[int]]:
-    fusions = defaultdict(list)
+    fusions = {}
 
-    for root, directories, filenames in os.walk(folder):
-        for filename in regex_filter(filenames, SPRITE_PATTERN):
-            head, body = os.path.splitext(filename)[0].split(".", 1)
-            fusions[int(head)].append(int(body))
+    if os.path.isdir(folder):
+        for filename in regex_filter(os.listdir(folder), ATLAS_PATTERN):
+            head = int(filename.removesuffix(ATLAS_EXTENSION))
+            bodies = SpriteAtlas(os.path.join(folder, filename)).bodies()
+            if bodies:
+                fusions[head] = bodies
 
-    return {key: sorted(val) for key, val in sorted(fusions.items(), key=lambda item: item[0])}
+        # Assets that were never packed still have one folder of PNGs per head
+        for entry in os.scandir(folder):
+            if entry.is_dir() and entry.name.isdigit() and int(entry.name) not in fusions:
+                filenames = regex_filter(os.listdir(entry.path), SPRITE_PATTERN)
+                bodies = [int(filename.split(".")[1]) for filename in filenames]
+                if bodies:
+                    fusions[int(entry.name)] = sorted(bodies)
 
+    return dict(sorted(fusions.items()))
 
-def get_fusions_diff(old: dict[int, list[int]], new: dict[int, list[int]]) -> dict[int, list[int]]:
-    diff = defaultdict(list)
 
-    for head in new:
-        if head in old:
-            for body in new[head]:
-                if body not in old[head]:
-                    diff[head].append(body)
-        else:
-            diff[head] = new[head][:]
+def index_fusions(folder: str, hashed: bool = False) -> dict[FusionKey, bytes | None]:
+    """Fusions of an atlas folder, with the hash of their content when ``hashed`` (``None`` otherwise)."""
+    index = {}
 
-    return diff
+    for head, bodies in get_fusions(folder).items():
+        atlas = read_atlas(folder, head) if hashed else None
+        for body in bodies:
+            if hashed:
+                index[head, body] = hashlib.blake2b(_read_sprite(folder, atlas, head, body), digest_size=16).digest()
+            else:
+                index[head, body] = None
+
+    return index
+
+
+def _read_sprite(folder: str, atlas: SpriteAtlas | None, head: int, body: int) -> bytes | memoryview:
+    if atlas is not None:
+        return atlas.get(body)
+    with open(os.path.join(folder, str(head), f"{head}.{body}.png"), "rb") as f:
+        return f.read()
+
+
+def get_fusions_diff[V](old: Mapping[FusionKey, V], new: Mapping[FusionKey, V]) -> FusionsDiff:
+    added = new.keys() - old.keys()
+    removed = old.keys() - new.keys()
+    modified = {key for key in new.keys() & old.keys() if new[key] != old[key]}
+    return FusionsDiff(added, removed, modified)
 
 
 def get_eggs(folder: str) -> list[int]:
@@ -0,0 +1,57 @@
+import logging
+import shlex
+import subprocess
+import sys
+from collections import defaultdict
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def measure_import_time(module: str) -> list[ImportTime]:
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    logger.info(f"Running command: {shlex.join(command)}")
+
+    result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors="replace")
+    timings = []
+
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            logger.error(f"[python] {line}")
+            continue
+
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        if not self_us.strip().isdigit():  # header
+            continue
+
+        depth = (len(name) - len(name.lstrip())) // 2
+        timings.append(ImportTime(name.strip(), int(self_us), int(cumulative_us), depth))
+
+    result.check_returncode()
+    return timings
+
+
+def report_import_time(module: str, top: int = 25) -> None:
+    timings = measure_import_time(module)
+    total_us = sum(timing.self_us for timing in timings)
+
+    logger.info(f"Importing '{module}' loads {len(timings)} modules in {total_us / 1000:.1f} ms")
+
+    logger.info(f"Top {top} modules by cumulative time:")
+    for timing in sorted(timings, key=lambda t: t.cumulative_us, reverse=True)[:top]:
+        logger.info(f"{timing.cumulative_us / 1000:>9.1f} ms {timing.self_us / 1000:>9.1f} ms self  {timing.module}")
+
+    packages = defaultdict(int)
+    for timing in timings:
+        packages[timing.module.split(".", 1)[0]] += timing.self_us
+
+    logger.info(f"Top {top} top-level packages by total time:")
+    for package, package_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        logger.info(f"{package_us / 1000:>9.1f} ms {100 * package_us / total_us:>5.1f}%  {package}")
@@ -0,0 +1,97 @@
+import logging
+import os
+import random
+import time
+from functools import partial
+from io import BytesIO
+from multiprocessing import Pool, cpu_count
+
+from PIL import Image
+from tqdm import tqdm
+
+from pokefusion.assetmanager import AssetManager
+from pokefusion.atlas import ATLAS_EXTENSION, SpriteAtlas, read_atlas
+from pokefusion.fusionapi import FusionClient
+from pokefusion.imagelib import ImagePipeline
+from pokefusion.services.guess import GUESS_GAMES
+from pokefusion.services.render import FusionJob, GuessFusionJob
+
+logger = logging.getLogger(__name__)
+
+
+def check_native_sprites(folder: str, sample: int = 500, seed: int | None = None) -> bool:
+    """
+    Renders sprites stored at native size and their upscaled counterpart (what the splitter stored before) through
+    the fusion render jobs, and checks that the outputs are pixel-identical.
+    """
+    start_time = time.perf_counter()
+
+    sprites = [
+        (head, body)
+        for head in _atlas_heads(folder)
+        for body in SpriteAtlas(os.path.join(folder, f"{head}{ATLAS_EXTENSION}")).bodies()
+    ]
+    if sample and sample < len(sprites):
+        sprites = random.Random(seed).sample(sprites, sample)
+
+    mismatches = []
+    checked = 0
+    cores = cpu_count()
+    desc = f"Checking native sprites (on {cores} cores)"
+    with Pool(cores) as pool:
+        func = partial(_check_sprite, folder=folder)
+        for sprite_checked, sprite_mismatches in tqdm(pool.imap_unordered(func, sprites, chunksize=8),
+                                                      total=len(sprites), desc=desc):
+            checked += sprite_checked
+            mismatches.extend(sprite_mismatches)
+
+    for mismatch in mismatches:
+        logger.error(f"Mismatch: {mismatch}")
+
+    elapsed_time = time.perf_counter() - start_time
+    logger.info(f"Checked {checked} native sprites ({len(sprites) - checked} already at display size), "
+                f"found {len(mismatches)} mismatches in {elapsed_time:.2f} seconds")
+    return not mismatches
+
+
+def _atlas_heads(folder: str) -> list[int]:
+    if not os.path.isdir(folder):
+        return []
+    return sorted(
+        int(filename.removesuffix(ATLAS_EXTENSION)) for filename in os.listdir(folder)
+        if filename.endswith(ATLAS_EXTENSION) and filename.removesuffix(ATLAS_EXTENSION).isdigit()
+    )
+
+
+def _check_sprite(sprite: tuple[int, int], folder: str) -> tuple[int, list[str]]:
+    head, body = sprite
+    native = bytes(read_atlas(folder, head).get(body))
+    pipeline = ImagePipeline.open(native)
+    scale = pipeline.upscale_factor(FusionClient.SPRITE_SIZE)
+    if scale == 1:
+        return 0, []
+
+    upscaled = pipeline.zoom(scale).to_buffer().getvalue()
+    egg = AssetManager.DEFAULT_EGG_PATH
+    mismatches = []
+
+    native_fusion = FusionJob(native, native, egg, egg).render()
+    upscaled_fusion = FusionJob(upscaled, upscaled, egg, egg).render()
+    if native_fusion.color != upscaled_fusion.color:
+        mismatches.append(f"{head}.{body} color {native_fusion.color} != {upscaled_fusion.color}")
+    if not _same_pixels(native_fusion.fusions, upscaled_fusion.fusions):
+        mismatches.append(f"{head}.{body} fusion")
+
+    for filters in {(), *(game.filters for game in GUESS_GAMES.values())}:
+        native_image, _ = GuessFusionJob(native, filters).render()
+        upscaled_image, _ = GuessFusionJob(upscaled, filters).render()
+        if not _same_pixels(native_image, upscaled_image):
+            mismatches.append(f"{head}.{body} filters {[filter_.name for filter_ in filters]}")
+
+    return 1, mismatches
+
+
+def _same_pixels(image1: bytes, image2: bytes) -> bool:
+    with Image.open(BytesIO(image1)) as im1, Image.open(BytesIO(image2)) as im2:
+        im1, im2 = im1.convert("RGBA"), im2.convert("RGBA")
+        return im1.size == im2.size and im1.tobytes() == im2.tobytes()
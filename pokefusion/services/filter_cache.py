@@ -0,0 +1,154 @@
+import hashlib
+import logging
+import os
+import threading
+from collections.abc import Sequence
+
+from pokefusion.imagelib import FilterType
+
+logger = logging.getLogger(__name__)
+
+# Bump when a filter's output changes so that old entries are no longer hit
+FILTER_CACHE_VERSION = 1
+
+
+class FilterCache:
+    """
+    Content-addressed disk cache of filtered sprites.
+
+    Entries are keyed by a hash of the source sprite bytes, the filter chain and the scale, so a sprite replaced by an
+    import simply misses. The oldest entries are evicted once the cache grows past ``max_size``.
+
+    Every method does blocking file I/O, the bot calls them from a thread. The size of the entries already on disk is
+    only known after scan().
+    """
+
+    def __init__(self, path: str, max_size: int):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._digests: dict[str, tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+        self.size = 0
+
+    def scan(self) -> None:
+        with self._lock:
+            self.size = sum(os.path.getsize(file) for file in self._files())
+
+    def key(self, sprite_path: str, filters: Sequence[FilterType], scale: int) -> str:
+        stat = os.stat(sprite_path)
+        cached = self._digests.get(sprite_path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            digest = cached[2]
+        else:
+            with open(sprite_path, "rb") as f:
+                digest = hashlib.file_digest(f, "sha256").hexdigest()
+            self._digests[sprite_path] = (stat.st_mtime_ns, stat.st_size, digest)
+
+        chain = ",".join(filter_.name for filter_ in filters)
+        return hashlib.sha256(f"{FILTER_CACHE_VERSION}:{digest}:{chain}:{scale}".encode()).hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.isfile(self._entry_path(key))
+
+    def get(self, key: str) -> bytes | None:
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # Recency for eviction
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except OSError as e:
+            logger.warning(f"Couldn't read filter cache entry {key}: {e}")
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+        except OSError as e:
+            logger.warning(f"Couldn't write filter cache entry {key}: {e}")
+            return
+
+        with self._lock:
+            # Concurrent misses on the same key overwrite each other, only the size difference is new
+            try:
+                replaced_size = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced_size = 0
+            try:
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Couldn't write filter cache entry {key}: {e}")
+                return
+
+            self.size += len(data) - replaced_size
+            if self.size > self.max_size:
+                self.evict()
+
+    def evict(self, target_ratio: float = 0.9) -> int:
+        entries = []
+        for file in self._files():
+            stat = os.stat(file)
+            entries.append((stat.st_mtime_ns, stat.st_size, file))
+        entries.sort()
+
+        self.size = sum(size for _, size, _ in entries)
+        target = self.max_size * target_ratio
+        evicted = 0
+        for _, size, file in entries:
+            if self.size <= target:
+                break
+            try:
+                os.remove(file)
+            except FileNotFoundError:
+                pass
+            self.size -= size
+            evicted += 1
+
+        if evicted:
+            logger.info(f"Evicted {evicted} filter cache entries ({self.size / 1024 ** 2:.1f} MB left)")
+        return evicted
+
+    def prune(self, keep: set[str]) -> int:
+        pruned = 0
+        for file in self._files():
+            if os.path.basename(file).removesuffix(".png") in keep:
+                continue
+            try:
+                self.size -= os.path.getsize(file)
+                os.remove(file)
+            except FileNotFoundError:
+                continue
+            pruned += 1
+        return pruned
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": self.size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], f"{key}.png")
+
+    def _files(self) -> list[str]:
+        if not os.path.isdir(self.path):
+            return []
+        return [
+            os.path.join(root, filename)
+            for root, _, filenames in os.walk(self.path)
+            for filename in filenames if filename.endswith(".png")
+        ]
@@ -0,0 +1,89 @@
+import logging
+from collections import deque
+from io import BytesIO
+from typing import NamedTuple
+
+from pokefusion.fusionapi import FusionClient, FusionResult, Sprite, SpriteClient
+from pokefusion.imagelib import RGB, FilterType
+from pokefusion.services.render import RenderService
+
+logger = logging.getLogger(__name__)
+
+
+class GuessGame(NamedTuple):
+    filters: tuple[FilterType, ...]
+    fusion: bool = False
+
+
+GUESS_GAMES: dict[str, GuessGame] = {
+    "silhouette": GuessGame((FilterType.SILHOUETTE,)),
+    "blur": GuessGame((FilterType.GAUSSIAN_BLUR,)),
+    "pixel": GuessGame((FilterType.PIXELATE,)),
+    "grayscale": GuessGame((FilterType.GRAYSCALE,)),
+    "edge": GuessGame((FilterType.EDGE,)),
+    "box": GuessGame((FilterType.BOX,)),
+    "swirl": GuessGame((FilterType.SWIRL,)),
+    "pixelblur": GuessGame((FilterType.GAUSSIAN_BLUR, FilterType.PIXELATE)),
+    "fusion": GuessGame((), fusion=True),
+    "pixelfusion": GuessGame((FilterType.PIXELATE,), fusion=True),
+    "fusionbox": GuessGame((FilterType.BOX,), fusion=True),
+}
+
+
+class GuessRound(NamedTuple):
+    answer: Sprite | FusionResult
+    image: bytes
+    color: RGB | None = None
+
+    @property
+    def fp(self) -> BytesIO:
+        return BytesIO(self.image)
+
+
+class GuessRoundPool:
+    """Keeps a few rounds of every guess game rendered ahead of time, refilled while the render service is idle."""
+
+    def __init__(self, fusion_client: FusionClient, sprite_client: SpriteClient, render_service: RenderService,
+                 size: int):
+        self.fusion_client = fusion_client
+        self.sprite_client = sprite_client
+        self.render_service = render_service
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._rounds: dict[str, deque[GuessRound]] = {game: deque() for game in GUESS_GAMES}
+
+    async def render(self, game: str) -> GuessRound:
+        filters, fusion = GUESS_GAMES[game]
+
+        if not fusion:
+            sprite = self.sprite_client.get_sprite("?")
+            return GuessRound(sprite, await self.render_service.render_guess_sprite(sprite.path, filters))
+
+        # A placeholder sprite would make the round unanswerable
+        result = self.fusion_client.random_fusion()
+        image, color = await self.render_service.render_guess_fusion(result, filters)
+        return GuessRound(result, image, color)
+
+    async def take(self, game: str) -> GuessRound:
+        rounds = self._rounds[game]
+        if rounds:
+            self.hits += 1
+            return rounds.popleft()
+
+        self.misses += 1
+        return await self.render(game)
+
+    async def refill(self) -> int:
+        rendered = 0
+        for game, rounds in self._rounds.items():
+            while len(rounds) < self.size:
+                # Commands always come first, only render when nothing else is queued
+                if self.render_service.pending:
+                    return rendered
+                rounds.append(await self.render(game))
+                rendered += 1
+        return rendered
+
+    def depths(self) -> dict[str, int]:
+        return {game: len(rounds) for game, rounds in self._rounds.items()}
@@ -0,0 +1,412 @@
+import asyncio
+import logging
+import os
+import pickle
+import shutil
+import signal
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+from PIL import Image
+
+from pokefusion.assetmanager import AssetManager
+from pokefusion.configmanager import RenderConfig
+from pokefusion.enums import RenderBackend
+from pokefusion.fusionapi import FusionClient, FusionResult
+from pokefusion.imagelib import RGB, FilterType, ImagePipeline
+from pokefusion.services.filter_cache import FilterCache
+
+logger = logging.getLogger(__name__)
+
+type RenderKey = tuple[int, int, str]
+
+
+class RenderQueueFull(Exception):
+    pass
+
+
+class RenderedFusion(NamedTuple):
+    fusions: bytes
+    eggs: bytes
+    color: RGB
+
+    @property
+    def size(self) -> int:
+        return len(self.fusions) + len(self.eggs)
+
+
+def render_key(result: FusionResult) -> RenderKey:
+    return result.head.dex_id, result.body.dex_id, result.tables.version
+
+
+def fusion_scale(pipeline: ImagePipeline) -> int:
+    return pipeline.upscale_factor(FusionClient.SPRITE_SIZE)
+
+
+def fusion_sprite(result: FusionResult) -> bytes:
+    # Jobs are hashed for coalescing and pickled for process workers, so they carry a copy of the atlas view
+    sprite = result.sprite
+    if sprite is None:
+        # Commands reject fusions without a sprite, this is the swapped side of an embed
+        logger.debug(f"Missing fusion sprite {result.head.dex_id}.{result.body.dex_id}, using a placeholder")
+        return AssetManager.get_misc("Unknown.png").data
+    return bytes(sprite)
+
+
+class FusionJob(NamedTuple):
+    sprite: bytes
+    swapped_sprite: bytes
+    egg_path: str
+    swapped_egg_path: str
+    color: RGB | None = None
+
+    def render(self) -> RenderedFusion:
+        fusion = open_image(self.sprite)
+        scale = fusion_scale(fusion)
+        color = self.color or fusion.dominant_color(scale)
+        swapped = open_image(self.swapped_sprite)
+        # Cropping before upscaling gives the same pixels for a fraction of the work
+        swapped = swapped.normalize().zoom(fusion_scale(swapped))
+        fusions = fusion.normalize().zoom(scale).merge(swapped, pixel_gap=50).to_buffer()
+        eggs = open_image(self.egg_path).normalize().merge(open_image(self.swapped_egg_path).normalize(), pixel_gap=5)
+        return RenderedFusion(fusions.getvalue(), eggs.to_buffer().getvalue(), color)
+
+
+def fusion_job(result: FusionResult) -> FusionJob:
+    swapped = result.swap()
+    return FusionJob(fusion_sprite(result), fusion_sprite(swapped), result.egg_path, swapped.egg_path, result.color)
+
+
+class GuessFusionJob(NamedTuple):
+    sprite: bytes
+    filters: tuple[FilterType, ...]
+    color: RGB | None = None
+
+    def render(self) -> tuple[bytes, RGB]:
+        pipeline = open_image(self.sprite)
+        scale = fusion_scale(pipeline)
+        color = self.color or pipeline.dominant_color(scale)
+        if not self.filters:
+            if scale == 1:
+                return self.sprite, color
+            return pipeline.zoom(scale).to_buffer().getvalue(), color
+
+        pipeline = pipeline.apply_filter(self.filters[0], scale=scale)
+        for filter_ in self.filters[1:]:
+            pipeline = pipeline.apply_filter(filter_)
+        return pipeline.to_buffer().getvalue(), color
+
+
+class GuessSpriteJob(NamedTuple):
+    path: str
+    filters: tuple[FilterType, ...]
+    scale: int = 3
+
+    def render(self) -> bytes:
+        pipeline = open_image(self.path).apply_filter(self.filters[0], scale=self.scale)
+        for filter_ in self.filters[1:]:
+            pipeline = pipeline.apply_filter(filter_)
+        return pipeline.to_buffer().getvalue()
+
+
+class ShinySpriteJob(NamedTuple):
+    path: str
+    shiny_path: str
+
+    def render(self) -> bytes:
+        shiny = open_image(self.shiny_path).normalize()
+        return open_image(self.path).normalize().merge(shiny, pixel_gap=5).to_buffer().getvalue()
+
+
+type RenderJob = FusionJob | GuessFusionJob | GuessSpriteJob | ShinySpriteJob
+
+_decode_cache: Callable[[str | bytes, int], ImagePipeline] | None = None
+
+
+def open_image(source: str | bytes) -> ImagePipeline:
+    if _decode_cache is None:
+        return ImagePipeline.open(source)
+    if isinstance(source, bytes):
+        return _decode_cache(source, 0)
+    return _decode_cache(source, os.stat(source).st_mtime_ns)
+
+
+def _decode(source: str | bytes, _mtime: int) -> ImagePipeline:
+    pipeline = ImagePipeline.open(source)
+    pipeline.image.load()
+    return pipeline
+
+
+def init_worker(decode_cache_size: int) -> None:
+    global _decode_cache
+    # Ctrl+C is handled by the bot, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _decode_cache = lru_cache(maxsize=decode_cache_size)(_decode)
+    Image.init()
+
+
+def execute(job: RenderJob) -> Any:
+    return job.render()
+
+
+class RenderCache:
+    """LRU cache of rendered fusions bounded by the total size of the encoded images, with an optional disk tier."""
+
+    def __init__(self, max_size: int, disk_path: str | None = None):
+        self.max_size = max_size
+        self.disk_path = disk_path
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[RenderKey, RenderedFusion] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: RenderKey) -> RenderedFusion | None:
+        """Memory tier only, a miss should fall back to load()."""
+        with self._lock:
+            rendered = self._entries.get(key)
+            if rendered is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return rendered
+
+    def load(self, key: RenderKey) -> RenderedFusion | None:
+        """Disk tier, blocking."""
+        rendered = self._read_disk(key)
+        with self._lock:
+            if rendered is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._insert(key, rendered)
+        return rendered
+
+    def put(self, key: RenderKey, rendered: RenderedFusion) -> None:
+        with self._lock:
+            self._insert(key, rendered)
+
+    def save(self, key: RenderKey, rendered: RenderedFusion) -> None:
+        """Disk tier, blocking."""
+        self._write_disk(key, rendered)
+
+    def drop_stale(self, version: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[2] != version]:
+                self.size -= self._entries.pop(key).size
+
+        if self.disk_path is None or not os.path.isdir(self.disk_path):
+            return
+
+        for entry in os.scandir(self.disk_path):
+            if entry.is_dir() and entry.name != version:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "size": self.size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _insert(self, key: RenderKey, rendered: RenderedFusion) -> None:
+        if rendered.size > self.max_size:
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= old.size
+
+        self._entries[key] = rendered
+        self.size += rendered.size
+        while self.size > self.max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.size
+            self.evictions += 1
+
+    def _disk_file(self, key: RenderKey) -> str:
+        head, body, version = key
+        return os.path.join(self.disk_path, version, str(head), f"{head}.{body}.pickle")
+
+    def _read_disk(self, key: RenderKey) -> RenderedFusion | None:
+        if self.disk_path is None:
+            return None
+
+        try:
+            with open(self._disk_file(key), "rb") as f:
+                return RenderedFusion(*pickle.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable render cache entry {key}: {e}")
+            return None
+
+    def _write_disk(self, key: RenderKey, rendered: RenderedFusion) -> None:
+        if self.disk_path is None:
+            return
+
+        path = self._disk_file(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump(tuple(rendered), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Couldn't write render cache entry {key}: {e}")
+
+
+class RenderService:
+    """
+    Runs render jobs in a pool of threads or long-lived worker processes so they never block the event loop.
+
+    Jobs are small picklable descriptors (sprite bytes or paths, filter chain, scale) and workers send back encoded PNG
+    bytes. Process workers keep their own decode cache and the pool is recreated if a worker dies. Identical jobs
+    submitted while one is in flight share its result instead of rendering again.
+    """
+
+    def __init__(self, config: RenderConfig, cache: RenderCache, filter_cache: FilterCache | None = None):
+        self.config = config
+        self.cache = cache
+        self.filter_cache = filter_cache
+        self.pending = 0
+        self.jobs = 0
+        self.restarts = 0
+        self.coalesced = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self._executor = self._create_executor()
+        self._inflight: dict[RenderJob, asyncio.Future] = {}
+        self._fusions: dict[RenderKey, asyncio.Future] = {}
+
+    def _create_executor(self) -> Executor:
+        if self.config.backend is RenderBackend.PROCESS:
+            return ProcessPoolExecutor(self.config.workers, initializer=init_worker,
+                                       initargs=(self.config.decode_cache_size,))
+        return ThreadPoolExecutor(self.config.workers, thread_name_prefix="render")
+
+    def _restart(self, broken: Executor) -> None:
+        # Concurrent jobs all fail with the same broken pool, only the first one replaces it
+        if self._executor is not broken:
+            return
+
+        logger.warning(f"Render worker died, restarting the {self.config.backend} pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._create_executor()
+        self.restarts += 1
+
+    async def _submit[T](self, job: RenderJob) -> T:
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            return await loop.run_in_executor(executor, execute, job)
+        except BrokenProcessPool:
+            self._restart(executor)
+            return await loop.run_in_executor(self._executor, execute, job)
+
+    async def run[T](self, job: RenderJob) -> T:
+        inflight = self._inflight.get(job)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        if self.pending >= self.config.max_pending:
+            raise RenderQueueFull(f"Render queue is full ({self.pending} pending jobs)")
+
+        # Counted before the job starts so that jobs submitted in the same tick can't exceed the cap
+        self.pending += 1
+        # Shielded so a cancelled command doesn't cancel the render for the others waiting on it
+        future = asyncio.ensure_future(self._run(job))
+        self._inflight[job] = future
+        future.add_done_callback(lambda _: self._done(job))
+        return await asyncio.shield(future)
+
+    def _done(self, job: RenderJob) -> None:
+        self.pending -= 1
+        self._inflight.pop(job, None)
+
+    async def _run[T](self, job: RenderJob) -> T:
+        start_time = time.perf_counter()
+        try:
+            return await self._submit(job)
+        finally:
+            elapsed_time = time.perf_counter() - start_time
+            self.jobs += 1
+            self.total_time += elapsed_time
+            self.max_time = max(self.max_time, elapsed_time)
+            logger.debug(f"Rendered {type(job).__name__} in {elapsed_time * 1000:.1f} ms ({self.pending} pending)")
+
+    async def render_fusion(self, result: FusionResult) -> RenderedFusion:
+        key = render_key(result)
+        rendered = self.cache.get(key)
+        if rendered is not None:
+            return rendered
+
+        inflight = self._fusions.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        # Only the first caller loads, renders and persists the fusion, the others wait on its result
+        future = asyncio.ensure_future(self._render_fusion(key, result))
+        self._fusions[key] = future
+        future.add_done_callback(lambda _: self._fusions.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _render_fusion(self, key: RenderKey, result: FusionResult) -> RenderedFusion:
+        rendered = await asyncio.to_thread(self.cache.load, key)
+        if rendered is None:
+            # Reading the sprites stats files and may map an atlas
+            rendered = await self.run(await asyncio.to_thread(fusion_job, result))
+            self.cache.put(key, rendered)
+            await asyncio.to_thread(self.cache.save, key, rendered)
+        return rendered
+
+    async def render_guess_fusion(self, result: FusionResult, filters: Sequence[FilterType]) -> tuple[bytes, RGB]:
+        sprite = await asyncio.to_thread(fusion_sprite, result)
+        return await self.run(GuessFusionJob(sprite, tuple(filters), result.color))
+
+    async def render_guess_sprite(self, path: str, filters: Sequence[FilterType], scale: int = 3) -> bytes:
+        if self.filter_cache is None:
+            return await self.run(GuessSpriteJob(path, tuple(filters), scale))
+
+        # Hashing the sprite and reading or writing the cached image are blocking file I/O
+        key = await asyncio.to_thread(self.filter_cache.key, path, filters, scale)
+        image = await asyncio.to_thread(self.filter_cache.get, key)
+        if image is None:
+            image = await self.run(GuessSpriteJob(path, tuple(filters), scale))
+            await asyncio.to_thread(self.filter_cache.put, key, image)
+        return image
+
+    async def render_shiny_sprite(self, path: str, shiny_path: str) -> bytes:
+        return await self.run(ShinySpriteJob(path, shiny_path))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": self.config.backend,
+            "workers": self.config.workers,
+            "pending": self.pending,
+            "max_pending": self.config.max_pending,
+            "jobs": self.jobs,
+            "restarts": self.restarts,
+            "coalesced": self.coalesced,
+            "avg_time": self.total_time / self.jobs if self.jobs else 0.0,
+            "max_time": self.max_time,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,27 @@
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture
+def fixture_image():
+    def open_fixture(name: str) -> Image.Image:
+        with Image.open(FIXTURES_DIR / name) as image:
+            image.load()
+            return image
+
+    return open_fixture
+
+
+@pytest.fixture
+def encode_image():
+    def encode(image: Image.Image) -> bytes:
+        buffer = BytesIO()
+        image.save(buffer, "PNG")
+        return buffer.getvalue()
+
+    return encode
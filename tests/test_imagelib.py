@@ -0,0 +1,108 @@
+import random
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from pokefusion.imagelib import FilterType, ImagePipeline, get_dominant_colors
+
+
+def getcolors_dominant_color(image: Image.Image) -> tuple[int, int, int]:
+    """Reference implementation, the loop over getcolors() that the vectorized version replaced."""
+    w, h = image.size
+    colors = image.getcolors(w * h)
+    dominant = colors[0]
+
+    for count, color in colors:
+        cmax, cmin = max(color[:3]), min(color[:3])
+        lightness = (cmax + cmin) / 2
+        if lightness > 51 and count > dominant[0]:
+            dominant = (count, color)
+
+    r, g, b, _ = dominant[1]
+    return r, g, b
+
+
+def random_image(seed: int, max_value: int = 256, unique: bool = False) -> Image.Image:
+    """Random RGBA image of random size. Lots of colors make getcolors() hash collisions likely."""
+    rng = np.random.default_rng(seed)
+    width, height = rng.integers(1, 64, 2)
+    if unique:
+        # Every pixel a different color, so every color is tied at 1
+        packed = rng.choice(1 << 24, width * height, replace=False)
+        pixels = np.stack([packed & 0xFF, (packed >> 8) & 0xFF, packed >> 16, np.full_like(packed, 255)], axis=-1)
+    else:
+        pixels = rng.integers(0, max_value, (width * height, 4))
+    return Image.fromarray(pixels.reshape(height, width, 4).astype(np.uint8), "RGBA")
+
+
+@pytest.mark.parametrize("seed", range(400))
+def test_dominant_color_high_color(seed: int):
+    image = random_image(seed)
+    assert ImagePipeline(image).dominant_color() == getcolors_dominant_color(image)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_dominant_color_dark(seed: int):
+    # No color passes the lightness filter, the result is getcolors()'s first color
+    image = random_image(seed, max_value=52)
+    assert ImagePipeline(image).dominant_color() == getcolors_dominant_color(image)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_dominant_color_ties(seed: int):
+    image = random_image(seed, unique=True)
+    assert ImagePipeline(image).dominant_color() == getcolors_dominant_color(image)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_dominant_color_palette(seed: int):
+    # Few colors repeated a similar number of times, like pixel art
+    rng = random.Random(seed)
+    palette = [tuple(rng.randrange(256) for _ in range(3)) + (rng.choice((0, 255)),) for _ in range(rng.randint(1, 12))]
+    image = Image.new("RGBA", (16, 16))
+    image.putdata([rng.choice(palette) for _ in range(16 * 16)])
+    assert ImagePipeline(image).dominant_color() == getcolors_dominant_color(image)
+
+
+def test_dominant_color_converts_mode():
+    image = Image.new("RGB", (8, 8), (200, 100, 50))
+    assert ImagePipeline(image).dominant_color() == (200, 100, 50)
+
+
+@pytest.mark.parametrize("name", ["sprite", "noise"])
+def test_swirl_matches_scikit_image(fixture_image, name: str):
+    # Expected outputs were rendered with skimage.transform.swirl(rotation=0, strength=30, radius=min(size)), which
+    # the filter replaced
+    image = fixture_image(f"{name}.png")
+    if name == "sprite":
+        # Guess games swirl the cropped sprite at display size
+        image = ImagePipeline(image).normalize().zoom(3).image
+    swirled = ImagePipeline(image).filter(FilterType.SWIRL).image
+    expected = fixture_image(f"{name}_swirl.png")
+    assert swirled.size == expected.size
+    assert swirled.tobytes() == expected.tobytes()
+
+
+def test_dominant_colors_batch(encode_image):
+    images = [random_image(seed, max_value=max_value) for seed in range(40) for max_value in (4, 52, 256)]
+    expected = [getcolors_dominant_color(image) for image in images]
+    assert get_dominant_colors(map(encode_image, images)) == expected
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_dominant_colors_upscaled(encode_image, seed: int):
+    # Counting at native size for the display size must match counting the upscaled image
+    rng = np.random.default_rng(seed)
+    images = [random_image(seed * 3 + i, max_value=int(rng.choice((4, 52, 256)))) for i in range(3)]
+    size = 200
+    expected = [getcolors_dominant_color(ImagePipeline(image).zoom(ImagePipeline(image).upscale_factor(size)).image)
+                for image in images]
+    assert get_dominant_colors(map(encode_image, images), size=size) == expected
+
+
+def test_dominant_colors_sprite(fixture_image, encode_image):
+    sprite = fixture_image("sprite.png")
+    expected = getcolors_dominant_color(ImagePipeline(sprite).zoom(3).image)
+    assert get_dominant_colors([encode_image(sprite)], size=288) == [expected]
+    assert get_dominant_colors([]) == []
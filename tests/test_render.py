@@ -0,0 +1,80 @@
+import asyncio
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from pokefusion.configmanager import RenderConfig
+from pokefusion.fusionapi import FusionClient
+from pokefusion.imagelib import FilterType, merge_images
+from pokefusion.services.guess import GUESS_GAMES
+from pokefusion.services.render import FusionJob, GuessFusionJob, RenderCache, RenderQueueFull, RenderService, \
+    ShinySpriteJob
+
+FILTER_CHAINS = sorted({(), *((filter_,) for filter_ in FilterType), *(game.filters for game in GUESS_GAMES.values())},
+                       key=lambda filters: [filter_.name for filter_ in filters])
+
+
+def rgba_pixels(data: bytes) -> tuple[tuple[int, int], bytes]:
+    with Image.open(BytesIO(data)) as image:
+        image = image.convert("RGBA")
+        return image.size, image.tobytes()
+
+
+@pytest.fixture
+def sprites(fixture_image, encode_image) -> tuple[bytes, bytes, bytes, bytes]:
+    """Native size sprite and its swapped fusion, and both upscaled to display size like the splitter stored them."""
+    native = fixture_image("sprite.png")
+    swapped = native.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+    scale = FusionClient.SPRITE_SIZE // native.width
+    assert scale > 1
+
+    def upscale(image: Image.Image) -> Image.Image:
+        return image.resize((image.width * scale, image.height * scale), resample=Image.Resampling.NEAREST)
+
+    return encode_image(native), encode_image(swapped), encode_image(upscale(native)), encode_image(upscale(swapped))
+
+
+def test_fusion_job_native_sprite(sprites):
+    native, native_swapped, upscaled, upscaled_swapped = sprites
+    egg = str(Path(__file__).parent / "fixtures" / "sprite.png")
+
+    native_fusion = FusionJob(native, native_swapped, egg, egg).render()
+    upscaled_fusion = FusionJob(upscaled, upscaled_swapped, egg, egg).render()
+    assert native_fusion.color == upscaled_fusion.color
+    assert rgba_pixels(native_fusion.fusions) == rgba_pixels(upscaled_fusion.fusions)
+    assert native_fusion.eggs == upscaled_fusion.eggs
+
+
+@pytest.mark.parametrize("filters", FILTER_CHAINS, ids=lambda filters: "+".join(f.name for f in filters) or "NONE")
+def test_guess_fusion_job_native_sprite(sprites, filters: tuple[FilterType, ...]):
+    native, _, upscaled, _ = sprites
+
+    native_image, native_color = GuessFusionJob(native, filters).render()
+    upscaled_image, upscaled_color = GuessFusionJob(upscaled, filters).render()
+    assert native_color == upscaled_color
+    assert rgba_pixels(native_image) == rgba_pixels(upscaled_image)
+
+
+def test_shiny_sprite_job():
+    path = str(Path(__file__).parent / "fixtures" / "sprite.png")
+    shiny_path = str(Path(__file__).parent / "fixtures" / "noise.png")
+    assert ShinySpriteJob(path, shiny_path).render() == merge_images(path, shiny_path, pixel_gap=5).getvalue()
+
+
+def test_render_service_max_pending(fixture_image, encode_image):
+    sprite = encode_image(fixture_image("sprite.png"))
+    service = RenderService(RenderConfig.from_dict({"workers": 1, "max_pending": 2}), RenderCache(0))
+
+    async def render_all():
+        jobs = [GuessFusionJob(sprite, (filter_,)) for filter_ in FilterType]
+        results = await asyncio.gather(*map(service.run, jobs), return_exceptions=True)
+        return results, service.pending
+
+    try:
+        results, pending = asyncio.run(render_all())
+    finally:
+        service.shutdown()
+    assert sum(not isinstance(result, RenderQueueFull) for result in results) == 2
+    assert pending == 0
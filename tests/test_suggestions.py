@@ -0,0 +1,84 @@
+import random
+
+import pytest
+from fuzzywuzzy import fuzz, process
+
+from pokefusion.configmanager import ConfigManager
+from pokefusion.fusionapi import SuggestionIndex
+
+SPECIES = {
+    lang: [name for name in names if not name.isdigit()]
+    for lang, names in ConfigManager.get_lookup_infinitedex().items()
+}
+# Equal lengths and edit distances, fuzz.ratio can only tell them apart by choice order
+TIED_CHOICES = ["abcd", "abce", "abcf", "xbcd", "abc", "abcde"]
+
+
+def typo(name: str, rand: random.Random) -> str:
+    chars = list(name)
+    for _ in range(rand.randint(1, 3)):
+        index = rand.randrange(len(chars) + 1)
+        edit = rand.choice(("insert", "delete", "replace", "swap"))
+        if edit == "insert" or not chars:
+            chars.insert(index, rand.choice("abcdefghijklmnopqrstuvwxyz"))
+        elif edit == "delete":
+            del chars[min(index, len(chars) - 1)]
+        elif edit == "replace":
+            chars[min(index, len(chars) - 1)] = rand.choice("abcdefghijklmnopqrstuvwxyz")
+        elif len(chars) > 1:
+            index = min(index, len(chars) - 2)
+            chars[index], chars[index + 1] = chars[index + 1], chars[index]
+    return "".join(chars)
+
+
+def typo_queries(lang: str, count: int = 200, seed: int = 0) -> list[str]:
+    rand = random.Random(seed)
+    return [typo(rand.choice(SPECIES[lang]), rand) for _ in range(count)]
+
+
+# Scores far below any close match, where most length buckets can't be skipped
+DISSIMILAR_QUERIES = ["", "!!!", "z", "qqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqq", "xyzzy", "0", "a b c"]
+
+
+@pytest.mark.parametrize("lang", sorted(SPECIES))
+def test_suggest_typos(lang: str):
+    index = SuggestionIndex(SPECIES[lang])
+    for query in typo_queries(lang):
+        expected = process.extractOne(query, SPECIES[lang], score_cutoff=0, scorer=fuzz.ratio)
+        assert index.suggest(query) == [expected], query
+
+
+@pytest.mark.parametrize("lang", sorted(SPECIES))
+def test_suggest_dissimilar(lang: str):
+    index = SuggestionIndex(SPECIES[lang])
+    for query in DISSIMILAR_QUERIES:
+        expected = process.extractOne(query, SPECIES[lang], score_cutoff=0, scorer=fuzz.ratio)
+        assert index.suggest(query) == [expected], query
+
+
+@pytest.mark.parametrize("query", ["abcx", "abxd", "xbcx", "ab", "abcdx", "", "zzzz"])
+def test_suggest_ties(query: str):
+    index = SuggestionIndex(TIED_CHOICES)
+    expected = process.extractOne(query, TIED_CHOICES, score_cutoff=0, scorer=fuzz.ratio)
+    assert index.suggest(query) == [expected]
+    for limit in range(1, len(TIED_CHOICES) + 1):
+        assert index.suggest(query, limit) == process.extract(query, TIED_CHOICES, scorer=fuzz.ratio, limit=limit)
+
+
+@pytest.mark.parametrize("lang", sorted(SPECIES))
+def test_suggest_limit(lang: str):
+    index = SuggestionIndex(SPECIES[lang])
+    for query in typo_queries(lang, count=50, seed=1):
+        assert index.suggest(query, 5) == process.extract(query, SPECIES[lang], scorer=fuzz.ratio, limit=5), query
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_suggest_random_choices(seed: int):
+    # Short strings over a tiny alphabet give many ties and scores on both sides of the rounding in fuzz.ratio
+    rand = random.Random(seed)
+    choices = ["".join(rand.choices("abc", k=rand.randint(1, 8))) for _ in range(30)]
+    index = SuggestionIndex(choices)
+    for _ in range(20):
+        query = "".join(rand.choices("abc", k=rand.randint(1, 8)))
+        assert index.suggest(query) == [process.extractOne(query, choices, score_cutoff=0, scorer=fuzz.ratio)]
+        assert index.suggest(query, 3) == process.extract(query, choices, scorer=fuzz.ratio, limit=3)